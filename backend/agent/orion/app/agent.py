@@ -1,31 +1,89 @@
 """Point d'entrée principal de l'agent Orion."""
 from __future__ import annotations
 
+import os
+import time
 import logging
+import threading
 from dotenv import load_dotenv
 
 from livekit import rtc
 from livekit.agents import (
     AutoSubscribe,
     JobContext,
+    JobProcess,
     WorkerOptions,
     cli,
 )
 from livekit.agents.multimodal import MultimodalAgent
 from livekit.plugins import openai
 
-from orion.prompts.orion import orion_prompt_system
 from orion.utils.paths import get_env_path
+
+# Charge le fichier d'env avant les modules d'Orion, dont la configuration lit l'environnement
+load_dotenv(dotenv_path=str(get_env_path()))
+
+from orion.prompts.orion import orion_prompt_system, static_prompt
 from orion.app.functions import AssistantFnc
+from orion.app.link_feed import LinkFeed
+from orion.utils.metrics import start_metrics_server
+from orion.services.google.auth import service
+from orion.services.google.calendar_store import calendar_store
+from orion.services.google.contacts_directory import contact_directory
 
 # Configuration des logs : DEBUG pour voir les échanges détaillés
 logging.basicConfig(level=logging.DEBUG)
 
-# Charge le fichier d'env via utilitaire
-load_dotenv(dotenv_path=str(get_env_path()))
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# Calendriers chargés dans le cache local avant l'arrivée des jobs
+PREWARM_CALENDARS = ("MAINTENANCE_CALENDAR_ID", "PRODUCTION_LIGNE_1_CALENDAR_ID", "PRODUCTION_LIGNE_2_CALENDAR_ID")
+
+
+def _warm_caches():
+    """Charge l'annuaire des contacts et les calendriers (appels réseau, en arrière-plan)."""
+    started = time.perf_counter()
+    try:
+        contact_directory.sync(force=True)
+    except Exception as e:
+        logger.warning(f"Préchargement de l'annuaire des contacts impossible : {e}")
+
+    for calendar_name in PREWARM_CALENDARS:
+        calendar_id = os.getenv(calendar_name)
+        if not calendar_id:
+            continue
+        try:
+            calendar_store.sync(calendar_id, force=True)
+        except Exception as e:
+            logger.warning(f"Préchargement du calendrier {calendar_name} impossible : {e}")
+
+    logger.info(f"Caches Google préchargés en {time.perf_counter() - started:.2f}s")
+
+
+def prewarm(proc: JobProcess):
+    """
+    Prépare le processus avant l'arrivée des jobs : identifiants et services Google,
+    préfixe statique du prompt, puis annuaire et calendriers en arrière-plan.
+    Le job n'a plus qu'à se connecter à la room et démarrer l'agent.
+    """
+    started = time.perf_counter()
+
+    try:
+        # Identifiants puis construction des services (documents de découverte locaux)
+        for name in service:
+            service[name]
+    except Exception as e:
+        # Les outils Google retourneront leur propre erreur ; l'agent vocal reste disponible
+        logger.error(f"Initialisation des services Google impossible : {e}")
+    else:
+        # Le chargement des caches peut dépasser le délai d'initialisation du processus
+        threading.Thread(target=_warm_caches, name="orion-prewarm", daemon=True).start()
+
+    # Préfixe statique du prompt rendu une fois ; seul le bloc de session est calculé par job
+    static_prompt()
+    logger.info(f"Processus préchauffé en {time.perf_counter() - started:.2f}s")
+
 
 async def entrypoint(ctx: JobContext):
     """Fonction d'entrée principale pour démarrer l'agent."""
@@ -59,7 +117,8 @@ async def entrypoint(ctx: JobContext):
     ctx.room.on("track_subscribed", on_track_subscribed)
     ctx.room.on("track_published", on_track_published)
 
-    fnc_ctx = AssistantFnc()
+    # Les liens produits par les outils sont publiés sur le canal de données de la room
+    fnc_ctx = AssistantFnc(links=LinkFeed(ctx.room))
 
     model = openai.realtime.RealtimeModel(
         instructions=orion_prompt_system(),
@@ -75,9 +134,11 @@ async def entrypoint(ctx: JobContext):
 
 
 if __name__ == "__main__":
+    start_metrics_server()
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
             agent_name="orion-assistant",
         )
     )
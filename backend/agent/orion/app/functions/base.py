@@ -1,6 +1,10 @@
 """Classe de base pour toutes les fonctions de l'assistant."""
 from livekit.agents import llm
 import logging
+import dataclasses
+
+from orion.app.link_feed import LinkFeed
+from orion.utils.metrics import instrument_tool
 
 logger = logging.getLogger(__name__)
 
@@ -10,4 +14,12 @@ __all__ = ['BaseFunctions', 'llm']
 
 class BaseFunctions(llm.FunctionContext):
     """Classe de base pour toutes les fonctions de l'assistant."""
-    pass
+
+    def __init__(self, links: LinkFeed | None = None):
+        super().__init__()
+        # Liens et fiches de résultat envoyés à l'app (jamais de navigateur ouvert sur le worker)
+        self.links = links or LinkFeed()
+
+        # Mesurer la durée de chaque outil (métriques Prometheus)
+        for name, info in self.ai_functions.items():
+            self.ai_functions[name] = dataclasses.replace(info, callable=instrument_tool(name, info.callable))
@@ -5,16 +5,29 @@ import os
 import logging
 import datetime
 import urllib.parse
-import webbrowser
 from typing import Annotated, Optional
 
 from orion.utils.dates import paris_tz
 from orion.services.google.auth import service
+from orion.services.google.executor import execute
+from orion.services.google.batch import execute_batch
+from orion.services.google.fields import CALENDAR_EVENT_FIELDS
+from orion.services.google.calendar_store import calendar_store
 from orion.app.functions.base import BaseFunctions, llm
 
 logger = logging.getLogger(__name__)
 
 
+def _day_view_url(calendar_id: str, date: str) -> str:
+    """Lien vers la vue jour de Google Calendar pour un calendrier et une date (AAAA-MM-JJ)."""
+    day = datetime.date.fromisoformat(date)
+    return (
+        f"https://calendar.google.com/calendar/u/0/r/day/"
+        f"{day.year}/{day.month:02d}/{day.day:02d}?cid="
+        f"{urllib.parse.quote(calendar_id)}"
+    )
+
+
 class CalendarFunctions(BaseFunctions):
     """Fonctions pour gérer les événements Google Calendar."""
 
@@ -41,9 +54,9 @@ class CalendarFunctions(BaseFunctions):
             str, 
             llm.TypeInfo(description="The date of the event")
         ],
-        open_in_browser: Annotated[
+        show_in_app: Annotated[
             Optional[bool],
-            llm.TypeInfo(description="If true, open the created event in the browser")
+            llm.TypeInfo(description="If true, show the created event in the operator's app")
         ] = True,
     ):
         """
@@ -77,18 +90,18 @@ class CalendarFunctions(BaseFunctions):
                 }
 
             # Envoyer l'événement à google calendar
-            created_event = service['calendar'].events().insert(
+            created_event = await execute(service['calendar'].events().insert(
                 calendarId=calendar_id, 
-                body=event_body
-            ).execute()
+                body=event_body,
+                fields=CALENDAR_EVENT_FIELDS
+            ), "calendar")
+            calendar_store.upsert(calendar_id, created_event)
             event_link = created_event.get("htmlLink", "No link available")
 
             logger.info(f"L'événement a bien été créé ! {event_link}")
-            if open_in_browser and isinstance(event_link, str) and event_link.startswith("http"):
-                try:
-                    webbrowser.open(event_link)
-                except Exception as e:
-                    logger.warning(f"Impossible d'ouvrir le navigateur pour l'événement: {e}")
+            if show_in_app and isinstance(event_link, str) and event_link.startswith("http"):
+                self.links.publish("calendar_event", title, event_link, calendar=calendar_name, date=date,
+                                   start_time=start_time, end_time=end_time)
             return f"L'événement {title} a été créé avec succès : {event_link}"
         
         except Exception as e:
@@ -106,9 +119,9 @@ class CalendarFunctions(BaseFunctions):
             str,
             llm.TypeInfo(description="The date of the day of the events to list")
         ],
-        open_in_browser: Annotated[
+        show_in_app: Annotated[
             Optional[bool],
-            llm.TypeInfo(description="If true, open the calendar day view in the browser")
+            llm.TypeInfo(description="If true, show the calendar day view in the operator's app")
         ] = True,
     ):
         """
@@ -124,20 +137,14 @@ class CalendarFunctions(BaseFunctions):
                 logger.error(f"L'ID pour le calendrier '{calendar_name}' n'a pas été trouvé.")
                 raise ValueError(f"L'ID pour le calendrier '{calendar_name}' n'a pas été trouvé.")
             
-            date_obj = datetime.datetime.fromisoformat(date).replace(tzinfo=paris_tz)
+            date_obj = paris_tz.localize(datetime.datetime.fromisoformat(date))
 
-            start_time = date_obj.replace(hour=0, minute=0, second=1).isoformat()
-            end_time = date_obj.replace(hour=23, minute=59, second=59).isoformat()
-            
-            calendar_results = service['calendar'].events().list(
-                calendarId=calendar_id,
-                timeMin=start_time,
-                timeMax=end_time,
-                singleEvents=True,
-                orderBy="startTime",
-            ).execute()
+            start_time = date_obj.replace(hour=0, minute=0, second=1)
+            end_time = date_obj.replace(hour=23, minute=59, second=59)
 
-            items = calendar_results.get('items', [])
+            # Lecture depuis le cache local des événements (synchronisé de façon incrémentale)
+            await calendar_store.refresh(calendar_id)
+            items = calendar_store.events(calendar_id, start_time, end_time)
 
             logger.info(f"items :: {items}")
 
@@ -172,19 +179,10 @@ class CalendarFunctions(BaseFunctions):
 
                 response += f"- {event_title} (Début : {formatted_start_time}, Fin : {formatted_end_time})\n"
 
-            # Optionally open the calendar day view
-            if open_in_browser:
-                try:
-                    # Build a link to Google Calendar day view for the specified date and calendar
-                    date_obj_url = datetime.datetime.fromisoformat(date)
-                    cal_url = (
-                        f"https://calendar.google.com/calendar/u/0/r/day/"
-                        f"{date_obj_url.year}/{date_obj_url.month:02d}/{date_obj_url.day:02d}?cid="
-                        f"{urllib.parse.quote(calendar_id)}"
-                    )
-                    webbrowser.open(cal_url)
-                except Exception as e:
-                    logger.warning(f"Impossible d'ouvrir la vue jour du calendrier: {e}")
+            # Optionally show the calendar day view
+            if show_in_app:
+                self.links.publish("calendar_day", f"{calendar_name} - {date}", _day_view_url(calendar_id, date),
+                                   calendar=calendar_name, date=date)
 
             return response
         
@@ -215,9 +213,9 @@ class CalendarFunctions(BaseFunctions):
             str, 
             llm.TypeInfo(description="The date of the event to delete")
         ],
-        open_in_browser: Annotated[
+        show_in_app: Annotated[
             Optional[bool],
-            llm.TypeInfo(description="If true, open the calendar day view in the browser")
+            llm.TypeInfo(description="If true, show the calendar day view in the operator's app")
         ] = True,
     ):
         """
@@ -238,55 +236,41 @@ class CalendarFunctions(BaseFunctions):
             if not calendar_id:
                 raise ValueError(f"L'ID pour le calendrier {calendar_name} n'a pas été trouvé.")
             
-            date_obj = datetime.datetime.fromisoformat(date).replace(tzinfo=paris_tz)
-
-            start_time_list = date_obj.replace(hour=0, minute=0, second=1).isoformat()
-            end_time_list = date_obj.replace(hour=23, minute=59, second=59).isoformat()
-
-            events_result = service['calendar'].events().list(
-                calendarId=calendar_id,
-                timeMin=start_time_list,
-                timeMax=end_time_list,
-                singleEvents=True,
-                orderBy="startTime",
-            ).execute()
+            date_obj = paris_tz.localize(datetime.datetime.fromisoformat(date))
 
-            logger.info(f"Resultat liste evenement : {events_result}")
+            start_time_list = date_obj.replace(hour=0, minute=0, second=1)
+            end_time_list = date_obj.replace(hour=23, minute=59, second=59)
 
-            events = events_result.get('items', [])
+            # Synchronisation forcée : on ne supprime que des événements à jour
+            await calendar_store.refresh(calendar_id, force=True)
+            events = calendar_store.events(calendar_id, start_time_list, end_time_list)
 
             logger.info(f"Événements trouvés : {events}")
 
             if not events:
                 return f"Aucun événement trouvé pour le calendrier '{calendar_name}' à la date {date}."
 
-            deleted = False
-
-            for event in events:
-                event_start_time = event.get("start", {}).get("dateTime", "").split("T")[1][:5]
-                event_end_time = event.get("end", {}).get("dateTime", "").split("T")[1][:5]
+            # Regrouper toutes les suppressions dans une seule requête HTTP
+            delete_requests = {
+                event['id']: service['calendar'].events().delete(calendarId=calendar_id, eventId=event['id'])
+                for event in events
+                if event.get("summary", "").strip().lower() == title.strip().lower()
+            }
+            results = await execute_batch(delete_requests, "calendar")
 
-                event_id = event.get('id')
-                event_title = event.get("summary", "")
-                
-                if event_title.strip().lower() == title.strip().lower():
-                    # Suppression de l'événement
-                    service['calendar'].events().delete(calendarId=calendar_id, eventId=event_id).execute()
+            deleted = False
+            for event_id, result in results.items():
+                if isinstance(result, Exception):
+                    logger.error(f"Erreur lors de la suppression de l'événement {event_id} : {result}")
+                else:
                     deleted = True
-                    logger.info(f"Événement supprimé : {title}")
-    
+                    calendar_store.remove(calendar_id, event_id)
+                    logger.info(f"Événement supprimé : {title} ({event_id})")
+
             if deleted:
-                if open_in_browser:
-                    try:
-                        date_obj_url = datetime.datetime.fromisoformat(date)
-                        cal_url = (
-                            f"https://calendar.google.com/calendar/u/0/r/day/"
-                            f"{date_obj_url.year}/{date_obj_url.month:02d}/{date_obj_url.day:02d}?cid="
-                            f"{urllib.parse.quote(calendar_id)}"
-                        )
-                        webbrowser.open(cal_url)
-                    except Exception as e:
-                        logger.warning(f"Impossible d'ouvrir la vue jour du calendrier: {e}")
+                if show_in_app:
+                    self.links.publish("calendar_day", f"{calendar_name} - {date}", _day_view_url(calendar_id, date),
+                                       calendar=calendar_name, date=date, deleted=title)
                 return f"Événement '{title}' supprimé avec succès."
             else:
                 return f"L'événement '{title}' n'a pas pu être supprimé."
@@ -3,15 +3,24 @@ from __future__ import annotations
 
 import logging
 import urllib.parse
-import webbrowser
 from typing import Annotated, Optional
 
 from orion.services.google.auth import service
+from orion.services.google.executor import execute
+from orion.services.google.fields import PERSON_FIELDS, PERSON_MASK
+from orion.services.google.contacts_directory import contact_directory
 from orion.app.functions.base import BaseFunctions, llm
 
 logger = logging.getLogger(__name__)
 
 
+def _contact_url(resource_name: str) -> str:
+    """Lien vers la fiche Google Contacts d'un contact (page générale à défaut d'identifiant)."""
+    if not resource_name:
+        return "https://contacts.google.com/"
+    return f"https://contacts.google.com/person/{resource_name.replace('people/', '')}"
+
+
 class ContactFunctions(BaseFunctions):
     """Fonctions pour gérer les contacts Google."""
 
@@ -38,9 +47,9 @@ class ContactFunctions(BaseFunctions):
             Optional[str],
             llm.TypeInfo(description="Infos of the contact to create (optional)")
         ] = None,
-        open_in_browser: Annotated[
+        show_in_app: Annotated[
             Optional[bool],
-            llm.TypeInfo(description="If true, open Google Contacts in the browser")
+            llm.TypeInfo(description="If true, show the contact in the operator's app")
         ] = True,
     ):
         """
@@ -62,21 +71,15 @@ class ContactFunctions(BaseFunctions):
         }
 
         try:
-            create_response = service["people"].people().createContact(body=newcontact_data).execute()
-            if open_in_browser:
-                try:
-                    # Open the specific contact page using the resource name
-                    contact_resource_name = create_response.get("resourceName", "")
-                    if contact_resource_name:
-                        # Remove 'people/' prefix if present
-                        contact_id = contact_resource_name.replace("people/", "")
-                        contact_url = f"https://contacts.google.com/person/{contact_id}"
-                        webbrowser.open(contact_url)
-                    else:
-                        # Fallback to general contacts page
-                        webbrowser.open("https://contacts.google.com/")
-                except Exception as e:
-                    logger.warning(f"Impossible d'ouvrir Google Contacts: {e}")
+            create_response = await execute(service["people"].people().createContact(
+                body=newcontact_data,
+                personFields=PERSON_FIELDS,
+                fields=PERSON_MASK
+            ), "people")
+            contact_directory.upsert(create_response)
+            if show_in_app:
+                self.links.publish("contact", f"{first_name} {last_name}",
+                                   _contact_url(create_response.get("resourceName", "")), email=email)
             return 'Contact créé.'
 
         except Exception as e:
@@ -94,9 +97,9 @@ class ContactFunctions(BaseFunctions):
             str,
             llm.TypeInfo(description="Last name of the contact to delete")
         ],
-        open_in_browser: Annotated[
+        show_in_app: Annotated[
             Optional[bool],
-            llm.TypeInfo(description="If true, open Google Contacts in the browser")
+            llm.TypeInfo(description="If true, show the contact in the operator's app")
         ] = True,
     ):
         """
@@ -109,36 +112,23 @@ class ContactFunctions(BaseFunctions):
         logger.info(f"Suppression du contact {first_name} {last_name}.")
 
         try:
-            # On liste tous les contacts pour trouver le bon ID
-            list_contacts = service["people"].people().connections().list(
-                resourceName="people/me",
-                personFields="names"
-            ).execute()
-
-            contact_id = None
-
-            if "connections" in list_contacts:
-                for contact in list_contacts["connections"]:
-                    names = contact.get("names", "")
-                    for name in names:
-                        if name.get("givenName") == first_name and name.get("familyName") == last_name:
-                            contact_id = contact["resourceName"]
-                            break
-            
+            # On cherche le contact dans l'annuaire local (synchronisé de façon incrémentale)
+            await contact_directory.refresh()
+            matches = contact_directory.find(given_name=first_name, family_name=last_name)
+            contact_id = matches[0]["resourceName"] if matches else None
+
             if not contact_id:
                 logger.info(f"Aucun contact trouvé avec le nom {first_name} {last_name}.")
                 return f"Aucun contact trouvé avec le nom {first_name} {last_name}."
 
             # Supprimer le contact trouvé
-            delete_service = service["people"].people().deleteContact(resourceName=contact_id).execute()
-            if open_in_browser:
-                try:
-                    # Open a search for the deleted contact to show it's no longer there
-                    search_query = urllib.parse.quote(f"{first_name} {last_name}")
-                    contact_url = f"https://contacts.google.com/search/{search_query}"
-                    webbrowser.open(contact_url)
-                except Exception as e:
-                    logger.warning(f"Impossible d'ouvrir Google Contacts: {e}")
+            delete_service = await execute(service["people"].people().deleteContact(resourceName=contact_id), "people")
+            contact_directory.remove(contact_id)
+            if show_in_app:
+                # Recherche du contact supprimé pour montrer qu'il n'existe plus
+                search_query = urllib.parse.quote(f"{first_name} {last_name}")
+                self.links.publish("contact_deleted", f"{first_name} {last_name}",
+                                   f"https://contacts.google.com/search/{search_query}")
             return "Contact Supprimé"
 
         except Exception as e:
@@ -168,9 +158,9 @@ class ContactFunctions(BaseFunctions):
             Optional[str],
             llm.TypeInfo(description="Infos of the contact to modify (optional)")
         ] = None,
-        open_in_browser: Annotated[
+        show_in_app: Annotated[
             Optional[bool],
-            llm.TypeInfo(description="If true, open Google Contacts in the browser")
+            llm.TypeInfo(description="If true, show the contact in the operator's app")
         ] = True,
     ):
         """
@@ -186,25 +176,13 @@ class ContactFunctions(BaseFunctions):
         logger.info("Modifying the contact.")
 
         try:
-            # Lister tous les contacts
-            list_contacts = service["people"].people().connections().list(
-                resourceName="people/me",
-                personFields="names,emailAddresses,phoneNumbers,biographies"
-            ).execute()
-            
-            contact_id = None
-            existing_contact = None
-
-            # Trouver l'ID du contact correspondant et attribuer le bon contact à existing_contact
-            if "connections" in list_contacts:
-                for contact in list_contacts["connections"]:
-                    names = contact.get("names", "")
-                    for name in names:
-                        if name.get("givenName") == first_name and name.get("familyName") == last_name:
-                            contact_id = contact["resourceName"]
-                            existing_contact = contact
-                            break
-            
+            # Trouver le contact correspondant dans l'annuaire local, synchronisé de force :
+            # l'etag envoyé doit être celui de la dernière version du contact
+            await contact_directory.refresh(force=True)
+            matches = contact_directory.find(given_name=first_name, family_name=last_name)
+            existing_contact = matches[0] if matches else None
+            contact_id = existing_contact["resourceName"] if existing_contact else None
+
             # Si aucun identifiant n'est trouvé
             if not contact_id:
                 logger.info(f"Aucun contact trouvé avec le nom {first_name} {last_name}.")
@@ -212,6 +190,7 @@ class ContactFunctions(BaseFunctions):
             
             # Implémenter les nouvelles données
             updated_contact_data = {
+                "etag": existing_contact.get("etag"),  # Obligatoire : garantit qu'on modifie la dernière version
                 "names": existing_contact.get("names", []),  # Garde le nom existant
                 "emailAddresses": [{"value": email}] if email else existing_contact.get("emailAddresses", []),
                 "phoneNumbers": [{"value": phone_number}] if phone_number else existing_contact.get("phoneNumbers", []),
@@ -219,22 +198,18 @@ class ContactFunctions(BaseFunctions):
             }
 
             # Envoyer les modifications
-            update_service = service["people"].people().updateContact(
+            update_service = await execute(service["people"].people().updateContact(
                 resourceName=contact_id,
                 body=updated_contact_data,
                 # Spécifie les champs à modifier (names n'est pas à modifier car valeur obligatoire)
-                updateMask="emailAddresses,phoneNumbers,biographies"
-            ).execute()
-
-            if open_in_browser:
-                try:
-                    # Open the specific contact page using the resource name
-                    # Remove 'people/' prefix if present
-                    clean_contact_id = contact_id.replace("people/", "")
-                    contact_url = f"https://contacts.google.com/person/{clean_contact_id}"
-                    webbrowser.open(contact_url)
-                except Exception as e:
-                    logger.warning(f"Impossible d'ouvrir Google Contacts: {e}")
+                updatePersonFields="emailAddresses,phoneNumbers,biographies",
+                personFields=PERSON_FIELDS,
+                fields=PERSON_MASK
+            ), "people")
+            contact_directory.upsert(update_service)
+
+            if show_in_app:
+                self.links.publish("contact", f"{first_name} {last_name}", _contact_url(contact_id), email=email)
 
             return 'Contact modifié.'
 
@@ -261,9 +236,9 @@ class ContactFunctions(BaseFunctions):
             Optional[str],
             llm.TypeInfo(description="Infos of the contact to research.")
         ] = None,
-        open_in_browser: Annotated[
+        show_in_app: Annotated[
             Optional[bool],
-            llm.TypeInfo(description="If true, open Google Contacts search in the browser")
+            llm.TypeInfo(description="If true, show the Google Contacts search in the operator's app")
         ] = True,
     ):
         """
@@ -279,18 +254,24 @@ class ContactFunctions(BaseFunctions):
         logger.info("Recherche du contact.")
 
         try: 
-            # Lister tous les contacts
-            list_contacts = service["people"].people().connections().list(
-                resourceName="people/me",
-                personFields="names,nicknames,biographies,emailAddresses"
-            ).execute()
-            
-            if "connections" not in list_contacts:
+            # Filtrer par prénom, nom et surnom (exact, case-insensitive) via les index de l'annuaire local
+            await contact_directory.refresh()
+            if not len(contact_directory):
                 return "Aucun contact trouvé."
-            
+
+            candidates = contact_directory.find(given_name=first_name, family_name=last_name, nickname=nickname)
+
+            # Sans correspondance exacte, recherche approximative (accents, phonétique, trigrammes)
+            # car les noms proviennent de la transcription vocale
+            approximate = False
+            if not candidates and (first_name or last_name or nickname):
+                query = " ".join(part for part in (first_name, last_name, nickname) if part)
+                candidates = [contact for contact, score in contact_directory.search(query)]
+                approximate = True
+
             filtered_contacts = []
             
-            for contact in list_contacts["connections"]:
+            for contact in candidates:
                 # Liste tous les names, nicknames et biographies des contacts dans 3 tableaux différents
                 # Ce sont des listes
                 contact_names = contact.get("names", [])
@@ -304,25 +285,8 @@ class ContactFunctions(BaseFunctions):
                 contact_nickname = contact_nicknames[0].get("value") if contact_nicknames else None
                 contact_notes = contact_biographies[0].get("value") if contact_biographies else None
 
-                # Vérifier si le contact correspond aux critères de recherche
-                match = True
-
-                # Filtre par prénom (exact, case-insensitive)
-                if first_name:
-                    if not contact_first_name or contact_first_name.lower() != first_name.lower():
-                        match = False
-
-                # Filtre par nom de famille (exact, case-insensitive)
-                if last_name:
-                    if not contact_last_name or contact_last_name.lower() != last_name.lower():
-                        match = False
-
-                # Filtre par surnom (exact, case-insensitive)
-                if nickname:
-                    if not contact_nickname or contact_nickname.lower() != nickname.lower():
-                        match = False
-
                 # Filtre par notes/description (partial match, case-insensitive)
+                match = True
                 if notes:
                     if not contact_notes or notes.lower() not in contact_notes.lower():
                         match = False
@@ -360,6 +324,8 @@ class ContactFunctions(BaseFunctions):
 
             # Formater les résultats
             response = f"Found {len(filtered_contacts)} contact(s)"
+            if approximate:
+                response += " with a similar name (no exact match)"
             if notes:
                 response += f" matching '{notes}'"
             response += ":\n\n"
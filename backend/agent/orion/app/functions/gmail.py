@@ -3,17 +3,90 @@ from __future__ import annotations
 
 import re
 import logging
+from collections import OrderedDict
 import base64
 import urllib.parse
-import webbrowser
 from typing import Annotated, Optional
 from email.mime.text import MIMEText
 
+from googleapiclient.errors import HttpError
+
 from orion.services.google.auth import service
+from orion.services.google.executor import execute
+from orion.services.google.batch import execute_batch
+from orion.services.google.fields import (
+    GMAIL_DRAFT_FIELDS,
+    GMAIL_DRAFT_LIST_FIELDS,
+    GMAIL_MESSAGE_HEADERS_FIELDS,
+    GMAIL_SENT_MESSAGE_FIELDS,
+)
 from orion.app.functions.base import BaseFunctions, llm
 
 logger = logging.getLogger(__name__)
 
+# Brouillons créés par Orion, indexés par (destinataire, objet) : send_draft les envoie en un seul appel
+MAX_DRAFT_HANDLES = 200
+_draft_handles: OrderedDict[tuple[str, str], str] = OrderedDict()
+
+
+def _draft_key(recipient: str, subject: str) -> tuple[str, str]:
+    return recipient.strip().lower(), subject.strip()
+
+
+def _remember_draft(recipient: str, subject: str, draft_id: str):
+    key = _draft_key(recipient, subject)
+    _draft_handles[key] = draft_id
+    _draft_handles.move_to_end(key)
+    while len(_draft_handles) > MAX_DRAFT_HANDLES:
+        _draft_handles.popitem(last=False)
+
+
+async def _search_draft(recipient: str, subject: str) -> Optional[str]:
+    """
+    Recherche un brouillon par destinataire et objet via une requête Gmail (q),
+    en ne récupérant que les en-têtes To et Subject des candidats.
+    """
+    # Les guillemets délimitent l'objet dans la requête Gmail
+    quoted_subject = subject.replace('"', '')
+    query = f'in:drafts to:{recipient} subject:"{quoted_subject}"'
+    drafts_list = await execute(service['gmail'].users().drafts().list(
+        userId="me", q=query, maxResults=10, fields=GMAIL_DRAFT_LIST_FIELDS
+    ), "gmail")
+    drafts = drafts_list.get("drafts", [])
+    if not drafts:
+        return None
+
+    messages = await execute_batch({
+        draft["id"]: service['gmail'].users().messages().get(
+            userId="me",
+            id=draft["message"]["id"],
+            format="metadata",
+            metadataHeaders=["To", "Subject"],
+            fields=GMAIL_MESSAGE_HEADERS_FIELDS
+        )
+        for draft in drafts
+    }, "gmail")
+
+    for draft in drafts:
+        message = messages.get(draft["id"])
+        if message is None or isinstance(message, Exception):
+            continue
+
+        headers = {header["name"].lower(): header["value"] for header in message.get("payload", {}).get("headers", [])}
+
+        found_recipient = headers.get("to", "").strip()
+        found_subject = headers.get("subject", "").strip()
+
+        match = re.search(r'<(.*?)>', found_recipient)
+
+        if match:
+            found_recipient = match.group(1)
+
+        if found_recipient.lower() == recipient.strip().lower() and found_subject == subject.strip():
+            return draft["id"]
+
+    return None
+
 
 class GmailFunctions(BaseFunctions):
     """Fonctions pour gérer les emails Gmail."""
@@ -33,9 +106,9 @@ class GmailFunctions(BaseFunctions):
             str, 
             llm.TypeInfo(description="The body content of the email draft")
         ],
-        open_in_browser: Annotated[
+        show_in_app: Annotated[
             Optional[bool],
-            llm.TypeInfo(description="If true, open Gmail drafts with the created draft filtered")
+            llm.TypeInfo(description="If true, show the created draft in the operator's app")
         ] = True,
     ):
         """
@@ -60,17 +133,17 @@ class GmailFunctions(BaseFunctions):
             encoded_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
             draft = {"message": {"raw": encoded_message}}
 
-            creating_draft = service['gmail'].users().drafts().create(userId="me", body=draft).execute()
+            creating_draft = await execute(service['gmail'].users().drafts().create(
+                userId="me", body=draft, fields=GMAIL_DRAFT_FIELDS
+            ), "gmail")
 
             logger.info(f"Brouillon créé avec l'ID: {creating_draft['id']}")
-            if open_in_browser:
-                try:
-                    # Open Gmail drafts filtered by subject
-                    q = urllib.parse.quote(f"subject:{subject} in:drafts")
-                    gmail_url = f"https://mail.google.com/mail/u/0/#search/{q}"
-                    webbrowser.open(gmail_url)
-                except Exception as e:
-                    logger.warning(f"Impossible d'ouvrir Gmail (drafts): {e}")
+            _remember_draft(recipient, subject, creating_draft['id'])
+            if show_in_app:
+                # Gmail drafts filtered by subject
+                q = urllib.parse.quote(f"subject:{subject} in:drafts")
+                self.links.publish("gmail_draft", subject, f"https://mail.google.com/mail/u/0/#search/{q}",
+                                   recipient=recipient)
             return 'Brouillon créé.'
 
         except Exception as e:
@@ -88,9 +161,9 @@ class GmailFunctions(BaseFunctions):
             str, 
             llm.TypeInfo(description="The subject of the email draft")
         ],
-        open_in_browser: Annotated[
+        show_in_app: Annotated[
             Optional[bool],
-            llm.TypeInfo(description="If true, open Gmail sent mail filtered by subject")
+            llm.TypeInfo(description="If true, show the sent mail in the operator's app")
         ] = True,
     ):
         """
@@ -103,46 +176,37 @@ class GmailFunctions(BaseFunctions):
         logger.info(f"Sending a draft with these args : recipient={recipient}, subject={subject}")
 
         try:
-            drafts_list = service['gmail'].users().drafts().list(userId="me").execute()
-            drafts = drafts_list.get("drafts", [])
-
-            if not drafts:
-                logger.error("Aucun brouillon trouvé.")
-                return "Aucun brouillon trouvé."
-
-            draft_id = None
-
-            for draft in drafts:
-                draft_data = service['gmail'].users().drafts().get(userId="me", id=draft["id"]).execute()
-                message = draft_data["message"]
-                headers = {header["name"]: header["value"] for header in message["payload"]["headers"]}
-
-                found_recipient = headers.get("to", "").strip()
-                found_subject = headers.get("subject", "").strip()
+            send_response = None
 
-                match = re.search(r'<(.*?)>', found_recipient)
-
-                if match:
-                    found_recipient = match.group(1)
-
-                if found_recipient == recipient and found_subject == subject:
-                    draft_id = draft["id"]
-                    break
-
-            if not draft_id:
-                logger.error("Aucun brouillon correspondant trouvé.")
-                return "Aucun brouillon correspondant trouvé."
-
-            send_response = service['gmail'].users().drafts().send(userId="me", body={"id": draft_id}).execute()
+            # 1. Brouillon créé par Orion : envoi direct en un seul appel
+            draft_id = _draft_handles.pop(_draft_key(recipient, subject), None)
+            if draft_id:
+                try:
+                    send_response = await execute(service['gmail'].users().drafts().send(
+                        userId="me", body={"id": draft_id}, fields=GMAIL_SENT_MESSAGE_FIELDS
+                    ), "gmail")
+                except HttpError as e:
+                    if e.resp.status != 404:
+                        raise
+                    logger.info(f"Brouillon {draft_id} introuvable (supprimé ou déjà envoyé), recherche dans Gmail.")
+
+            # 2. Sinon, recherche ciblée du brouillon dans Gmail
+            if send_response is None:
+                draft_id = await _search_draft(recipient, subject)
+
+                if not draft_id:
+                    logger.error("Aucun brouillon correspondant trouvé.")
+                    return "Aucun brouillon correspondant trouvé."
+
+                send_response = await execute(service['gmail'].users().drafts().send(
+                    userId="me", body={"id": draft_id}, fields=GMAIL_SENT_MESSAGE_FIELDS
+                ), "gmail")
 
             logger.info(f"Brouillon envoyé avec succès : {send_response}")
-            if open_in_browser:
-                try:
-                    q = urllib.parse.quote(f"subject:{subject} in:sent")
-                    gmail_url = f"https://mail.google.com/mail/u/0/#search/{q}"
-                    webbrowser.open(gmail_url)
-                except Exception as e:
-                    logger.warning(f"Impossible d'ouvrir Gmail (sent): {e}")
+            if show_in_app:
+                q = urllib.parse.quote(f"subject:{subject} in:sent")
+                self.links.publish("gmail_sent", subject, f"https://mail.google.com/mail/u/0/#search/{q}",
+                                   recipient=recipient)
             return 'Brouillon envoyé.'
 
         except Exception as e:
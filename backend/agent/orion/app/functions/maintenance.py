@@ -2,21 +2,168 @@
 from __future__ import annotations
 
 import os
-import re
+import asyncio
 import logging
-import random
 import base64
 import datetime
-import webbrowser
-from typing import Annotated, Optional
+import itertools
+from typing import Annotated, Iterator, Optional
 from email.mime.text import MIMEText
 
 from orion.utils.dates import paris_tz
+from orion.utils.interventions import normalize_urgence
 from orion.services.google.auth import service
+from orion.services.google.executor import execute
+from orion.services.google.batch import execute_batch
+from orion.services.google.fields import CALENDAR_EVENT_FIELDS, GMAIL_SENT_MESSAGE_FIELDS
+from orion.services.google.calendar_store import calendar_store, event_bounds
 from orion.app.functions.base import BaseFunctions, llm
 
 logger = logging.getLogger(__name__)
 
+# Métadonnées typées des interventions, écrites dans extendedProperties.private
+# (valeurs limitées à 1024 caractères par l'API Calendar)
+INTERVENTION_TYPE = "maintenance"
+MAX_PROPERTY_LENGTH = 1024
+
+
+def intervention_properties(ligne: str, machine: str, probleme: str, urgence: str) -> dict:
+    """Retourne les propriétés privées d'une intervention de maintenance."""
+    return {
+        "type": INTERVENTION_TYPE,
+        "ligne": ligne,
+        "machine": machine[:MAX_PROPERTY_LENGTH],
+        "probleme": probleme[:MAX_PROPERTY_LENGTH],
+        "urgence": urgence,
+    }
+
+
+# Nombre d'interventions listées par défaut par get_maintenance_schedule
+DEFAULT_SCHEDULE_LIMIT = 20
+
+
+def parse_intervention(event: dict) -> dict:
+    """Extrait les champs d'affichage d'un événement du calendrier maintenance."""
+    title = event.get('summary', 'Sans titre')
+
+    start, end = event_bounds(event)
+    if 'dateTime' in event['start']:
+        heure_debut = start.strftime('%H:%M')
+        heure_fin = end.strftime('%H:%M')
+    else:  # Format date seule
+        heure_debut = "Toute la journée"
+        heure_fin = ""
+
+    # Lire les champs typés de l'intervention
+    properties = event.get('extendedProperties', {}).get('private', {})
+    ligne = properties.get('ligne', "?")
+    machine = properties.get('machine', "?")
+    probleme = properties.get('probleme', "?")
+    niveau_urgence = properties.get('urgence', "?")
+
+    # Événements sans champs typés (créés à la main) : essayer de parser le titre
+    # Format titre : "MAINTENANCE - [Problème] - [Machine]"
+    if machine == "?" and " - " in title:
+        parts = title.split(" - ")
+        if len(parts) >= 3:
+            probleme = parts[1].strip() if probleme == "?" else probleme
+            machine = parts[2].strip()
+
+    return {
+        'ligne': ligne,
+        'machine': machine,
+        'probleme': probleme,
+        'urgence': niveau_urgence,
+        'jour': start.date(),
+        'date': start.strftime('%d/%m/%Y'),
+        'heure_debut': heure_debut,
+        'heure_fin': heure_fin,
+        'titre': title,
+    }
+
+
+def iter_interventions(
+    calendar_id: str,
+    time_min: datetime.datetime,
+    time_max: datetime.datetime,
+    private_properties: dict[str, str] | None = None,
+) -> Iterator[dict]:
+    """Parcourt les interventions de la plage par ordre de début, sans les charger toutes en mémoire."""
+    for event in calendar_store.iter_events(calendar_id, time_min, time_max, private_properties):
+        try:
+            yield parse_intervention(event)
+        except (KeyError, ValueError) as e:
+            logger.warning(f"Intervention {event.get('id')} ignorée (dates illisibles) : {e}")
+
+
+# Marge de recherche au-delà de la fenêtre d'urgence si le calendrier est chargé (20 demi-heures)
+SLOT_SEARCH_EXTENSION_MINUTES = 600
+SLOT_STEP = datetime.timedelta(minutes=30)
+
+
+def _ceil_half_hour(value: datetime.datetime) -> datetime.datetime:
+    """Arrondit à la demi-heure supérieure."""
+    rounded = value.replace(minute=(value.minute // 30) * 30, second=0, microsecond=0)
+    if rounded < value:
+        rounded += SLOT_STEP
+    return rounded
+
+
+def find_free_slot(
+    busy: list[tuple[datetime.datetime, datetime.datetime]],
+    earliest_start: datetime.datetime,
+    latest_start: datetime.datetime,
+    duration: datetime.timedelta,
+) -> Optional[datetime.datetime]:
+    """
+    Retourne le début du premier créneau libre (aligné sur la demi-heure) de la durée demandée.
+
+    Args:
+        busy (list): Plages occupées (début, fin)
+        earliest_start (datetime): Début au plus tôt
+        latest_start (datetime): Début au plus tard
+        duration (timedelta): Durée de l'intervention
+    """
+    candidate = _ceil_half_hour(earliest_start)
+
+    for busy_start, busy_end in sorted(busy):
+        if busy_end <= candidate:
+            continue
+        if busy_start >= candidate + duration:
+            break
+        # Chevauchement : reprendre juste après la plage occupée
+        candidate = _ceil_half_hour(busy_end)
+
+    if candidate > latest_start:
+        return None
+    return candidate
+
+
+async def _cancel_events(created_events: list[tuple[str, dict]]) -> list[tuple[str, dict]]:
+    """
+    Supprime les événements déjà créés (compensation d'une planification partielle).
+
+    Retourne les événements qui n'ont pas pu être supprimés.
+    """
+    try:
+        results = await execute_batch({
+            index: service['calendar'].events().delete(calendarId=calendar_id, eventId=event['id'])
+            for index, (calendar_id, event) in enumerate(created_events)
+        }, "calendar")
+    except Exception as e:
+        results = {index: e for index in range(len(created_events))}
+
+    not_cancelled = []
+    for index, (calendar_id, event) in enumerate(created_events):
+        result = results.get(index)
+        if isinstance(result, Exception):
+            logger.error(f"Impossible d'annuler l'événement {event.get('id')} ({calendar_id}) : {result}")
+            not_cancelled.append((calendar_id, event))
+        else:
+            calendar_store.remove(calendar_id, event['id'])
+            logger.info(f"Événement {event.get('id')} annulé dans {calendar_id}")
+    return not_cancelled
+
 
 class MaintenanceFunctions(BaseFunctions):
     """Fonctions pour gérer la maintenance de production."""
@@ -59,14 +206,14 @@ class MaintenanceFunctions(BaseFunctions):
             logger.info(f"Heure actuelle Paris : {now_paris}")
 
             # 2. Calculer les créneaux selon l'urgence
-            urgence_lower = urgence.lower()
+            niveau_urgence = normalize_urgence(urgence)
 
-            if urgence_lower == "urgent" or urgence_lower == "haute":
+            if niveau_urgence == "urgent":
                 # Urgent : entre 5 et 30 minutes
                 start_offset_min = 5
                 start_offset_max = 30
                 duration_hours = 1  # Durée de l'intervention : 1h
-            elif urgence_lower == "moyen" or urgence_lower == "moyenne":
+            elif niveau_urgence == "moyen":
                 # Moyen : entre 1h et 3h
                 start_offset_min = 60
                 start_offset_max = 180
@@ -89,50 +236,28 @@ class MaintenanceFunctions(BaseFunctions):
             if not calendar_maintenance or not calendar_ligne:
                 return "Erreur : calendriers de production non configurés dans .env"
 
-            # 4. Fonction pour vérifier si un créneau est disponible
-            def check_availability(start_time, end_time):
-                """Vérifie si le calendrier maintenance est libre dans ce créneau"""
-                try:
-                    events_result = service['calendar'].events().list(
-                        calendarId=calendar_maintenance,
-                        timeMin=start_time.isoformat(),
-                        timeMax=end_time.isoformat(),
-                        singleEvents=True,
-                        orderBy="startTime"
-                    ).execute()
-
-                    events = events_result.get('items', [])
-                    return len(events) == 0  # Disponible si aucun événement
-                except Exception as e:
-                    logger.error(f"Erreur vérification disponibilité : {e}")
-                    return True  # En cas d'erreur, on autorise
-
-            # 5. Trouver le premier créneau disponible
-            slot_found = False
-            tentative = 0
-            max_tentatives = 20
-
-            while not slot_found and tentative < max_tentatives:
-                # Calculer un créneau de départ aléatoire dans la plage
-                offset_minutes = random.randint(start_offset_min, start_offset_max) + (tentative * 30)
-
-                start_time = now_paris + datetime.timedelta(minutes=offset_minutes)
-                end_time = start_time + datetime.timedelta(hours=duration_hours)
-
-                # Arrondir à la demi-heure la plus proche
-                start_time = start_time.replace(minute=(start_time.minute // 30) * 30, second=0, microsecond=0)
-                end_time = start_time + datetime.timedelta(hours=duration_hours)
-
-                # Vérifier disponibilité
-                if check_availability(start_time, end_time):
-                    slot_found = True
-                    logger.info(f"Créneau trouvé : {start_time} - {end_time}")
-                else:
-                    logger.info(f"Créneau occupé, tentative suivante...")
-                    tentative += 1
+            # 4. Récupérer les plages occupées sur toute la fenêtre depuis le cache local
+            earliest_start = now_paris + datetime.timedelta(minutes=start_offset_min)
+            latest_start = now_paris + datetime.timedelta(minutes=start_offset_max + SLOT_SEARCH_EXTENSION_MINUTES)
+            duration = datetime.timedelta(hours=duration_hours)
+
+            # Synchronisation incrémentale forcée (un seul appel) pour ne jamais réserver un créneau déjà pris.
+            # En cas d'échec, l'erreur remonte : le calendrier n'est jamais considéré libre par défaut.
+            await calendar_store.refresh(calendar_maintenance, force=True)
 
-            if not slot_found:
-                return f"Erreur : impossible de trouver un créneau disponible dans les {max_tentatives} prochaines tentatives"
+            busy = [
+                event_bounds(event)
+                for event in calendar_store.events(calendar_maintenance, earliest_start, latest_start + duration)
+                if event.get("transparency") != "transparent"
+            ]
+
+            # 5. Trouver localement le premier créneau libre
+            start_time = find_free_slot(busy, earliest_start, latest_start, duration)
+            if start_time is None:
+                return "Erreur : impossible de trouver un créneau disponible dans le calendrier maintenance"
+
+            end_time = start_time + duration
+            logger.info(f"Créneau trouvé : {start_time} - {end_time}")
 
             # 6. Créer le titre de l'événement
             event_title = f"MAINTENANCE - {probleme_description[:50]} - {machine_name}"
@@ -146,7 +271,7 @@ class MaintenanceFunctions(BaseFunctions):
                 f"Signalé le : {now_paris.strftime('%d/%m/%Y à %H:%M')}"
             )
 
-            # 8. Créer l'événement dans le calendrier maintenance
+            # 8. Préparer l'événement, commun aux calendriers maintenance et ligne de production
             event_body = {
                 "summary": event_title,
                 "description": event_description,
@@ -157,41 +282,14 @@ class MaintenanceFunctions(BaseFunctions):
                 "end": {
                     "dateTime": end_time.isoformat(),
                     "timeZone": "Europe/Paris"
+                },
+                # Champs typés pour filtrer et relire l'intervention sans analyser la description
+                "extendedProperties": {
+                    "private": intervention_properties(ligne_production, machine_name, probleme_description, niveau_urgence)
                 }
             }
 
-            event_maintenance = service['calendar'].events().insert(
-                calendarId=calendar_maintenance,
-                body=event_body
-            ).execute()
-            logger.info(f"Événement créé dans calendrier maintenance : {event_maintenance.get('id')}")
-
-            # Ouvrir l'événement maintenance dans le navigateur
-            event_maintenance_link = event_maintenance.get('htmlLink')
-            if event_maintenance_link:
-                try:
-                    webbrowser.open(event_maintenance_link)
-                    logger.info(f"Ouverture événement maintenance dans le navigateur")
-                except Exception as e:
-                    logger.warning(f"Impossible d'ouvrir l'événement maintenance : {e}")
-
-            # 9. Créer le même événement dans le calendrier de la ligne de production
-            event_ligne = service['calendar'].events().insert(
-                calendarId=calendar_ligne,
-                body=event_body
-            ).execute()
-            logger.info(f"Événement créé dans calendrier ligne {ligne_production} : {event_ligne.get('id')}")
-
-            # Ouvrir l'événement de la ligne dans le navigateur
-            event_ligne_link = event_ligne.get('htmlLink')
-            if event_ligne_link:
-                try:
-                    webbrowser.open(event_ligne_link)
-                    logger.info(f"Ouverture événement ligne {ligne_production} dans le navigateur")
-                except Exception as e:
-                    logger.warning(f"Impossible d'ouvrir l'événement ligne : {e}")
-
-            # 10. Envoyer l'email de maintenance (directement, pas en brouillon)
+            # 9. Préparer l'email de maintenance (envoyé directement, pas en brouillon)
             email_maintenance_addr = os.getenv("EMAIL_MAINTENANCE", "maintenance@orion.com")
 
             email_subject = f"[{urgence.upper()}] Maintenance requise - Ligne {ligne_production} - {machine_name}"
@@ -217,26 +315,97 @@ class MaintenanceFunctions(BaseFunctions):
             encoded_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
             send_message = {"raw": encoded_message}
 
-            # Envoyer directement l'email
-            email_sent = service['gmail'].users().messages().send(userId="me", body=send_message).execute()
-            logger.info(f"Email envoyé à {email_maintenance_addr} : {email_sent.get('id')}")
+            # 10. Créer les deux événements et envoyer l'email en parallèle
+            # (les deux insertions partagent une seule requête HTTP batch)
+            events_created, email_sent = await asyncio.gather(
+                execute_batch({
+                    "maintenance": service['calendar'].events().insert(
+                        calendarId=calendar_maintenance,
+                        body=event_body,
+                        fields=CALENDAR_EVENT_FIELDS
+                    ),
+                    "ligne": service['calendar'].events().insert(
+                        calendarId=calendar_ligne,
+                        body=event_body,
+                        fields=CALENDAR_EVENT_FIELDS
+                    ),
+                }, "calendar"),
+                execute(service['gmail'].users().messages().send(
+                    userId="me", body=send_message, fields=GMAIL_SENT_MESSAGE_FIELDS
+                ), "gmail"),
+                return_exceptions=True,
+            )
+
+            if isinstance(events_created, BaseException):
+                event_maintenance = event_ligne = events_created
+            else:
+                event_maintenance = events_created["maintenance"]
+                event_ligne = events_created["ligne"]
+
+            created_events = [
+                (calendar_id, event)
+                for calendar_id, event in ((calendar_maintenance, event_maintenance), (calendar_ligne, event_ligne))
+                if not isinstance(event, BaseException)
+            ]
+            calendar_errors = [event for event in (event_maintenance, event_ligne) if isinstance(event, BaseException)]
+            email_error = email_sent if isinstance(email_sent, BaseException) else None
+
+            # Échec partiel des calendriers : annuler l'événement déjà créé pour ne pas laisser un planning incohérent
+            if calendar_errors:
+                logger.error(f"Échec de création des événements de maintenance : {calendar_errors}")
+                not_cancelled = await _cancel_events(created_events)
+
+                response = f"Erreur lors de la planification : {calendar_errors[0]}\n"
+                if not_cancelled:
+                    response += f"Attention : {len(not_cancelled)} événement(s) créé(s) n'ont pas pu être annulés\n"
+                elif created_events:
+                    response += "L'événement déjà créé a été annulé\n"
+                if email_error:
+                    response += "Aucun email n'a été envoyé"
+                else:
+                    response += f"Attention : l'email a déjà été envoyé à {email_maintenance_addr}"
+                return response
 
-            # Ouvrir Gmail dans le navigateur pour voir l'email envoyé
-            try:
-                gmail_sent_url = f"https://mail.google.com/mail/u/0/#sent/{email_sent.get('id')}"
-                webbrowser.open(gmail_sent_url)
-                logger.info(f"Ouverture Gmail (email envoyé) dans le navigateur")
-            except Exception as e:
-                logger.warning(f"Impossible d'ouvrir Gmail : {e}")
+            calendar_store.upsert(calendar_maintenance, event_maintenance)
+            calendar_store.upsert(calendar_ligne, event_ligne)
+            logger.info(f"Événement créé dans calendrier maintenance : {event_maintenance.get('id')}")
+            logger.info(f"Événement créé dans calendrier ligne {ligne_production} : {event_ligne.get('id')}")
+
+            # Envoyer la fiche de l'intervention à l'app (liens vers les deux événements)
+            self.links.publish(
+                "maintenance",
+                f"{machine_name} - ligne {ligne_production}",
+                event_maintenance.get('htmlLink'),
+                ligne=ligne_production,
+                machine=machine_name,
+                probleme=probleme_description,
+                urgence=urgence,
+                debut=start_time.isoformat(),
+                fin=end_time.isoformat(),
+                lien_ligne=event_ligne.get('htmlLink'),
+            )
+
+            if email_error:
+                logger.error(f"Erreur lors de l'envoi de l'email de maintenance : {email_error}")
+            else:
+                logger.info(f"Email envoyé à {email_maintenance_addr} : {email_sent.get('id')}")
+                self.links.publish("gmail_sent", email_subject,
+                                   f"https://mail.google.com/mail/u/0/#sent/{email_sent.get('id')}",
+                                   recipient=email_maintenance_addr)
 
             # 11. Retourner la confirmation
+            if email_error:
+                email_status = f"Attention : l'email à {email_maintenance_addr} n'a pas pu être envoyé ({email_error})"
+            else:
+                email_status = f"Email envoyé à {email_maintenance_addr}"
+
             response = (
                 f"Maintenance planifiée avec succès !\n\n"
                 f"Ligne {ligne_production} - {machine_name}\n"
                 f"Problème : {probleme_description}\n"
                 f"Urgence : {urgence}\n\n"
                 f"Intervention prévue le {start_time.strftime('%d/%m/%Y')} de {start_time.strftime('%H:%M')} à {end_time.strftime('%H:%M')}\n\n"
-                f"Email envoyé à {email_maintenance_addr}\n"
+                f"{email_status}\n"
                 f"Événements créés dans les calendriers (maintenance + ligne {ligne_production})"
             )
 
@@ -255,6 +424,18 @@ class MaintenanceFunctions(BaseFunctions):
             Optional[int],
             llm.TypeInfo(description="Nombre de jours à consulter dans le futur (par défaut: 7)")
         ] = 7,
+        ligne_production: Annotated[
+            Optional[str],
+            llm.TypeInfo(description="Ne garder que les interventions de cette ligne de production (1 ou 2, optionnel)")
+        ] = None,
+        urgence: Annotated[
+            Optional[str],
+            llm.TypeInfo(description="Ne garder que ce niveau d'urgence: 'urgent', 'moyen' ou 'faible' (optionnel)")
+        ] = None,
+        limite: Annotated[
+            Optional[int],
+            llm.TypeInfo(description=f"Nombre maximal d'interventions à lister (par défaut: {DEFAULT_SCHEDULE_LIMIT})")
+        ] = DEFAULT_SCHEDULE_LIMIT,
     ):
         """
         Récupère les prochaines interventions de maintenance depuis le calendrier maintenance.
@@ -262,6 +443,9 @@ class MaintenanceFunctions(BaseFunctions):
 
         Args:
             nombre_jours (int): Nombre de jours à consulter dans le futur
+            ligne_production (str): Filtre optionnel sur la ligne de production
+            urgence (str): Filtre optionnel sur le niveau d'urgence
+            limite (int): Nombre maximal d'interventions listées
         """
         logger.info(f"Récupération du planning de maintenance (prochains {nombre_jours} jours)")
 
@@ -272,142 +456,68 @@ class MaintenanceFunctions(BaseFunctions):
             if not calendar_maintenance:
                 return "Erreur : calendrier de maintenance non configuré dans .env"
 
+            nombre_jours = nombre_jours or 7
+            limite = max(limite or DEFAULT_SCHEDULE_LIMIT, 1)
+
             # 2. Calculer la période de temps
             now_paris = datetime.datetime.now(paris_tz)
-            time_min = now_paris.isoformat()
-            time_max = (now_paris + datetime.timedelta(days=nombre_jours)).isoformat()
-
-            # 3. Récupérer les événements du calendrier maintenance
-            events_result = service['calendar'].events().list(
-                calendarId=calendar_maintenance,
-                timeMin=time_min,
-                timeMax=time_max,
-                singleEvents=True,
-                orderBy='startTime',
-                maxResults=20
-            ).execute()
-
-            events = events_result.get('items', [])
-
-            if not events:
-                return f"Aucune intervention de maintenance planifiée dans les {nombre_jours} prochains jours."
+            time_max = now_paris + datetime.timedelta(days=nombre_jours)
 
-            # 4. Parser et formater les événements
-            interventions = []
-
-            for event in events:
-                # Extraire le titre et la description
-                title = event.get('summary', 'Sans titre')
-                description = event.get('description', '')
-
-                # Extraire les dates/heures
-                start = event['start'].get('dateTime', event['start'].get('date'))
-                end = event['end'].get('dateTime', event['end'].get('date'))
-
-                # Parser la date/heure
-                try:
-                    if 'T' in start:  # Format dateTime
-                        start_dt = datetime.datetime.fromisoformat(start.replace('Z', '+00:00'))
-                        end_dt = datetime.datetime.fromisoformat(end.replace('Z', '+00:00'))
-
-                        # Convertir en heure de Paris si besoin
-                        if start_dt.tzinfo is None:
-                            start_dt = paris_tz.localize(start_dt)
-                        else:
-                            start_dt = start_dt.astimezone(paris_tz)
-
-                        if end_dt.tzinfo is None:
-                            end_dt = paris_tz.localize(end_dt)
-                        else:
-                            end_dt = end_dt.astimezone(paris_tz)
-
-                        date_str = start_dt.strftime('%d/%m/%Y')
-                        heure_debut = start_dt.strftime('%H:%M')
-                        heure_fin = end_dt.strftime('%H:%M')
-                    else:  # Format date seule
-                        date_str = start
-                        heure_debut = "Toute la journée"
-                        heure_fin = ""
-                except Exception as e:
-                    logger.warning(f"Erreur parsing date: {e}")
-                    date_str = start
-                    heure_debut = "?"
-                    heure_fin = "?"
-
-                # Parser la description pour extraire les infos
-                # Format : Ligne de production : X, Machine : XXX, Problème : XXX, Urgence : XXX
-                ligne = "?"
-                machine = "?"
-                probleme = "?"
-                urgence = "?"
-
-                if description:
-                    ligne_match = re.search(r'Ligne de production\s*:\s*(\d+)', description)
-                    machine_match = re.search(r'Machine\s*:\s*(.+?)(?:\n|$)', description)
-                    probleme_match = re.search(r'Problème\s*:\s*(.+?)(?:\n|$)', description)
-                    urgence_match = re.search(r'Urgence\s*:\s*(\w+)', description)
-
-                    if ligne_match:
-                        ligne = ligne_match.group(1)
-                    if machine_match:
-                        machine = machine_match.group(1).strip()
-                    if probleme_match:
-                        probleme = probleme_match.group(1).strip()
-                    if urgence_match:
-                        urgence = urgence_match.group(1).strip()
-
-                # Si on ne trouve pas les infos dans la description, essayer de parser le titre
-                # Format titre : "MAINTENANCE - [Problème] - [Machine]"
-                if machine == "?" and " - " in title:
-                    parts = title.split(" - ")
-                    if len(parts) >= 3:
-                        probleme = parts[1].strip() if probleme == "?" else probleme
-                        machine = parts[2].strip()
-
-                interventions.append({
-                    'ligne': ligne,
-                    'machine': machine,
-                    'probleme': probleme,
-                    'urgence': urgence,
-                    'date': date_str,
-                    'heure_debut': heure_debut,
-                    'heure_fin': heure_fin,
-                    'titre': title
-                })
-
-            # 5. Formater la réponse
-            response = f"Prochaines interventions de maintenance ({len(interventions)}) :\n\n"
-
-            # Calculer les dates pour "aujourd'hui" et "demain"
-            now_paris = datetime.datetime.now(paris_tz)
-            aujourd_hui_str = now_paris.strftime('%d/%m/%Y')
-            demain_str = (now_paris + datetime.timedelta(days=1)).strftime('%d/%m/%Y')
+            # 3. Parcourir les interventions depuis le cache local (toutes les pages de l'API y sont
+            # déjà synchronisées), filtrées sur leurs propriétés privées
+            filters = {}
+            if ligne_production:
+                filters["ligne"] = ligne_production
+            if urgence:
+                filters["urgence"] = normalize_urgence(urgence)
+
+            await calendar_store.refresh(calendar_maintenance)
+            interventions = iter_interventions(calendar_maintenance, now_paris, time_max, filters)
 
-            for idx, inter in enumerate(interventions, 1):
-                response += f"{idx}. Ligne {inter['ligne']} - {inter['machine']}\n"
+            # 4. Formater les `limite` premières interventions au fil de l'eau
+            aujourd_hui = now_paris.date()
+            demain = aujourd_hui + datetime.timedelta(days=1)
+
+            lines = []
+            for idx, inter in enumerate(itertools.islice(interventions, limite), 1):
+                lines.append(f"{idx}. Ligne {inter['ligne']} - {inter['machine']}\n")
 
                 if inter['urgence'] != "?":
-                    response += f"   Urgence : {inter['urgence']}\n"
+                    lines.append(f"   Urgence : {inter['urgence']}\n")
 
-                response += f"   Problème : {inter['probleme']}\n"
+                lines.append(f"   Problème : {inter['probleme']}\n")
 
                 # Remplacer la date par "aujourd'hui" ou "demain" si applicable
-                date_display = inter['date']
-                if inter['date'] == aujourd_hui_str:
+                if inter['jour'] == aujourd_hui:
                     date_display = "aujourd'hui"
-                elif inter['date'] == demain_str:
+                elif inter['jour'] == demain:
                     date_display = "demain"
+                else:
+                    date_display = inter['date']
 
-                response += f"   Date : {date_display}\n"
+                lines.append(f"   Date : {date_display}\n")
 
                 if inter['heure_fin']:
-                    response += f"   Horaire : {inter['heure_debut']} - {inter['heure_fin']}\n"
+                    lines.append(f"   Horaire : {inter['heure_debut']} - {inter['heure_fin']}\n\n")
                 else:
-                    response += f"   Horaire : {inter['heure_debut']}\n"
+                    lines.append(f"   Horaire : {inter['heure_debut']}\n\n")
 
-                response += "\n"
+            if not lines:
+                return f"Aucune intervention de maintenance planifiée dans les {nombre_jours} prochains jours."
 
-            return response
+            # 5. Signaler les interventions non listées plutôt que de les tronquer silencieusement
+            listed = idx
+            remaining = sum(1 for _ in interventions)
+            if remaining:
+                header = f"Prochaines interventions de maintenance ({listed} sur {listed + remaining}) :\n\n"
+                lines.append(
+                    f"... et {remaining} autre(s) intervention(s) sur la période. "
+                    f"Précisez une ligne, une urgence ou une période plus courte pour les voir.\n"
+                )
+            else:
+                header = f"Prochaines interventions de maintenance ({listed}) :\n\n"
+
+            return header + "".join(lines)
 
         except Exception as e:
             logger.error(f"Erreur lors de la récupération du planning de maintenance : {e}")
@@ -0,0 +1,61 @@
+"""Publication des liens et fiches de résultat vers l'app, via le canal de données LiveKit.
+
+Les outils ne lancent plus de navigateur sur le worker : chaque lien (événement
+créé, brouillon, contact...) est publié sur le sujet LINK_TOPIC de la room, et
+l'app mobile l'affiche. La publication se fait en tâche de fond : l'outil
+retourne sa réponse sans attendre l'envoi.
+"""
+from __future__ import annotations
+
+import json
+import time
+import asyncio
+import logging
+
+from livekit import rtc
+
+logger = logging.getLogger(__name__)
+
+# Sujet du canal de données écouté par l'app
+LINK_TOPIC = "orion.links"
+
+
+class LinkFeed:
+    """Flux de liens publié sur le canal de données d'une room."""
+
+    def __init__(self, room: rtc.Room | None = None):
+        self._room = room
+        # Références fortes vers les publications en cours (sinon collectées avant la fin)
+        self._tasks: set[asyncio.Task] = set()
+
+    def publish(self, kind: str, title: str, url: str | None, **details):
+        """
+        Publie une fiche de résultat sans bloquer l'outil appelant.
+
+        Args:
+            kind (str): Type de fiche ('calendar_event', 'calendar_day', 'gmail_draft', 'contact'...)
+            title (str): Titre affiché par l'app
+            url (str): Lien vers Google (optionnel)
+            details: Champs complémentaires affichés sur la fiche
+        """
+        if self._room is None or not self._room.isconnected():
+            logger.debug(f"Lien non publié (aucune room connectée) : {kind} {url}")
+            return
+
+        payload = json.dumps({
+            "type": kind,
+            "title": title,
+            "url": url,
+            "details": details,
+            "timestamp": int(time.time() * 1000),
+        }, ensure_ascii=False, default=str)
+
+        task = asyncio.get_running_loop().create_task(self._send(payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, payload: str):
+        try:
+            await self._room.local_participant.publish_data(payload, reliable=True, topic=LINK_TOPIC)
+        except Exception as e:
+            logger.warning(f"Impossible de publier le lien sur le canal de données : {e}")
@@ -1,75 +1,81 @@
-import os.path
-import os
-from orion.utils.paths import get_credentials_path, get_token_path
+import threading
+from collections.abc import Mapping
+from orion.utils.paths import get_discovery_dir
 import logging
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from google.auth.exceptions import RefreshError
-
-#If you modify these scopes, delete the file token.json.
-SCOPES = ["https://www.googleapis.com/auth/calendar",
-          "https://mail.google.com/",
-          "https://www.googleapis.com/auth/gmail.send",
-          "https://www.googleapis.com/auth/gmail.modify",
-          "https://www.googleapis.com/auth/contacts",
-]
-
-# Construire les chemins absolus pour token.json et credentials.json via utils (surcharges env supportées)
-token_path = str(get_token_path())
-credentials_path = str(get_credentials_path())
+from googleapiclient.discovery import build, build_from_document
+from orion.services.google.credentials import SCOPES, credential_manager
+
+# Versions des APIs utilisées par Orion
+SERVICE_VERSIONS = {
+    "gmail": "v1",
+    "calendar": "v3",
+    "people": "v1",
+}
+
 
 def authenticate_google_api():
+    """Retourne les identifiants Google partagés du processus (rafraîchis en arrière-plan)."""
+    return credential_manager.credentials
+
+
+def _load_discovery_document(name, version):
+    """Retourne le document de découverte mis en cache localement, s'il existe."""
+    document_path = get_discovery_dir() / f"{name}.{version}.json"
+    if document_path.exists():
+        return document_path.read_text(encoding="utf-8")
+    return None
+
+
+class GoogleServices(Mapping):
+    """
+    Fabrique paresseuse des services Google.
+
+    Les identifiants et les services ne sont créés qu'au premier accès
+    (ex: service['calendar']), puis réutilisés par tous les jobs du processus.
+    Les documents de découverte proviennent du cache local (ORION_DISCOVERY_DIR)
+    ou de ceux embarqués dans googleapiclient : aucun appel réseau n'est fait
+    pour construire un service.
+    """
+
+    def __init__(self):
+        self._services = {}
+        self._lock = threading.RLock()
+
+    @property
+    def credentials(self):
+        return authenticate_google_api()
+
+    def _build(self, name):
+        version = SERVICE_VERSIONS[name]
+        document = _load_discovery_document(name, version)
+        if document:
+            return build_from_document(document, credentials=self.credentials)
+        return build(name, version, credentials=self.credentials, static_discovery=True, cache_discovery=False)
+
+    def __getitem__(self, name):
+        if name not in SERVICE_VERSIONS:
+            raise KeyError(name)
+
+        built = self._services.get(name)
+        if built is None:
+            with self._lock:
+                built = self._services.get(name)
+                if built is None:
+                    built = self._build(name)
+                    self._services[name] = built
+                    logging.info(f"Service Google '{name}' prêt à être utilisé.")
+        return built
+
+    def override(self, name, built):
+        """Remplace un service déjà construit (ex: client pointant vers une fausse API pour les bancs d'essai)."""
+        with self._lock:
+            self._services[name] = built
+
+    def __iter__(self):
+        return iter(SERVICE_VERSIONS)
+
+    def __len__(self):
+        return len(SERVICE_VERSIONS)
+
 
-    creds = None
-
-    # Vérifier si le fichier token.json existe
-    if os.path.exists(token_path):
-        creds = Credentials.from_authorized_user_file(token_path, SCOPES)
-    
-    #If there is no valid token, he creates a new one
-    if not creds or not creds.valid:
-
-        try:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
-                creds = flow.run_local_server(port=0)
-
-        except RefreshError:
-            print("Le jeton est invalide ou expiré. Suppression du jeton et redémarrage du flux d'authentification.")
-            if os.path.exists(token_path):
-                os.remove(token_path)
-            flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
-            creds = flow.run_local_server(port=0)
-
-        # Sauvegarder le nouveau token dans token.json
-        with open(token_path, "w") as token:
-            token.write(creds.to_json())
-    
-    # Création des différents services
-    try:
-        services = {
-            "gmail": build("gmail", "v1", credentials=creds),
-            "calendar": build("calendar", "v3", credentials=creds),
-            "people": build("people", "v1", credentials=creds)
-        }
-        logging.info("Authentification réussie pour les différents services.")
-        return services
-    except HttpError as error:
-        logging.error(f"Erreur lors de la connexion aux APIs : {error}")
-        return None
-
-service = authenticate_google_api()
-
-if service:
-    gmail_service = service["gmail"]
-    calendar_service = service["calendar"]
-    people_service = service["people"]
-    logging.info("Les différents services sont prêts à être utilisés.")
-
-else:
-    logging.error("L'authentification a échoué.")
\ No newline at end of file
+service = GoogleServices()
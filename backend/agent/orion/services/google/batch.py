@@ -0,0 +1,133 @@
+"""Regroupement de plusieurs requêtes Google API dans une seule requête HTTP.
+
+S'appuie sur les requêtes batch de googleapiclient : les opérations sont
+envoyées ensemble et chaque résultat (ou erreur) est rattaché à la clé de
+l'opération correspondante. Chaque opération consomme un jeton de débit ;
+celles refusées pour limitation sont renvoyées dans un nouveau lot.
+"""
+from __future__ import annotations
+
+import time
+import asyncio
+import logging
+from typing import Hashable, Mapping
+
+from orion.services.google.auth import service
+from orion.services.google.executor import default_timeout, measure_response_size, run_blocking
+from orion.services.google.ratelimit import is_rate_limited, is_retryable, limiter, retry_delay, wait_before_retry
+from orion.services.google.transport import transport
+from orion.utils.metrics import GOOGLE_REQUEST_DURATION, GOOGLE_REQUESTS, GOOGLE_RETRIES, error_status
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximal d'opérations par requête batch (limite recommandée par Google)
+MAX_BATCH_SIZE = 50
+
+
+def _send_batch(api: str, requests: list[tuple[Hashable, object]]) -> dict:
+    """Envoie un lot de requêtes en une requête HTTP (appel bloquant) et retourne les résultats par clé."""
+    results = {}
+    request_ids = {str(index): key for index, (key, _) in enumerate(requests)}
+    methods = {str(index): getattr(request, "methodId", None) or "unknown" for index, (_, request) in enumerate(requests)}
+
+    def callback(request_id, response, exception):
+        results[request_ids[request_id]] = exception if exception is not None else response
+        status = "ok" if exception is None else error_status(exception)
+        GOOGLE_REQUESTS.labels(api=api, method=methods[request_id], status=status).inc()
+
+    batch = service[api].new_batch_http_request(callback=callback)
+    for index, (_, request) in enumerate(requests):
+        batch.add(request, request_id=str(index))
+
+    started = time.perf_counter()
+    try:
+        batch.execute(http=transport.http())
+    except Exception as e:
+        GOOGLE_REQUESTS.labels(api=api, method="batch", status=error_status(e)).inc()
+        raise
+    finally:
+        GOOGLE_REQUEST_DURATION.labels(api=api, method="batch").observe(time.perf_counter() - started)
+    return results
+
+
+def _run_batch(api: str, requests: list[tuple[Hashable, object]], timeout: float | None = None) -> dict:
+    """Exécute un lot en respectant le débit de l'API et relance les opérations limitées."""
+    for _, request in requests:
+        measure_response_size(request, api)
+    bucket = limiter.bucket(api)
+    deadline = time.monotonic() + (default_timeout() if timeout is None else timeout)
+
+    results = {}
+    pending = requests
+    attempt = 0
+    while True:
+        bucket.acquire(len(pending), deadline=deadline)
+        batch_error = None
+        try:
+            results.update(_send_batch(api, pending))
+        except Exception as e:
+            # Lot entier refusé : relancé seulement s'il s'agit d'une limitation de débit
+            if not is_rate_limited(e):
+                raise
+            batch_error = e
+
+        if batch_error is not None:
+            retry, error = pending, batch_error
+        else:
+            retry = [
+                (key, request) for key, request in pending
+                if isinstance(results[key], Exception) and is_retryable(results[key], request.method)
+            ]
+            if not retry:
+                return results
+            error = results[retry[0][0]]
+
+        delay = retry_delay(error, attempt, deadline)
+        if delay is None:
+            # Tentatives épuisées : les opérations gardent leur dernière erreur, un lot refusé remonte
+            if batch_error is not None:
+                raise batch_error
+            return results
+
+        logger.warning(f"Batch {api} : {len(retry)} opération(s) limitée(s), nouvelle tentative dans {delay:.1f}s")
+        for _, request in retry:
+            GOOGLE_RETRIES.labels(api=api, method=getattr(request, "methodId", None) or "unknown").inc()
+        wait_before_retry(error, delay, bucket)
+        pending = retry
+        attempt += 1
+
+
+async def execute_batch(
+    requests: Mapping[Hashable, object],
+    api: str,
+    timeout: float | None = None,
+) -> dict:
+    """
+    Exécute plusieurs requêtes d'un même service en un minimum d'allers-retours HTTP.
+
+    Args:
+        requests (Mapping): Requêtes construites, indexées par une clé libre
+        api (str): Service concerné ('calendar', 'gmail' ou 'people')
+        timeout (float): Délai maximal de chaque lot en secondes
+
+    Returns:
+        dict: Résultat de chaque opération indexé par sa clé. Une opération en
+        échec a pour valeur l'exception correspondante (HttpError) : l'appelant
+        décide opération par opération.
+    """
+    items = list(requests.items())
+    if not items:
+        return {}
+
+    chunks = [items[i:i + MAX_BATCH_SIZE] for i in range(0, len(items), MAX_BATCH_SIZE)]
+    chunk_results = await asyncio.gather(
+        *(run_blocking(api, _run_batch, api, chunk, timeout, timeout=timeout) for chunk in chunks)
+    )
+
+    results = {}
+    for chunk_result in chunk_results:
+        results.update(chunk_result)
+
+    failed = sum(1 for result in results.values() if isinstance(result, Exception))
+    logger.debug(f"Batch {api} : {len(results)} opération(s), {failed} en échec")
+    return results
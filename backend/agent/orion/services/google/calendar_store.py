@@ -0,0 +1,237 @@
+"""Cache local des événements Google Calendar, synchronisé de façon incrémentale.
+
+Chaque calendrier consulté (maintenance, lignes de production...) est chargé
+une première fois, puis maintenu à jour via le syncToken de l'API Calendar.
+Toutes les lectures par plage horaire sont servies depuis la mémoire ; les
+événements créés ou supprimés par Orion y sont appliqués immédiatement.
+"""
+from __future__ import annotations
+
+import os
+import time
+import logging
+import datetime
+import threading
+from typing import Iterator
+
+from googleapiclient.errors import HttpError
+
+from orion.utils.dates import paris_tz
+from orion.services.google.auth import service
+from orion.services.google.executor import execute_blocking, run_blocking
+from orion.services.google.fields import CALENDAR_EVENT_LIST_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Intervalle minimal (en secondes) entre deux synchronisations incrémentales d'un calendrier
+# (ORION_CALENDAR_SYNC_INTERVAL, lu à chaque synchronisation : le .env est chargé après l'import)
+SYNC_INTERVAL = 60.0
+
+# Profondeur (en jours) du chargement initial dans le passé (ORION_CALENDAR_SYNC_LOOKBACK_DAYS)
+SYNC_LOOKBACK_DAYS = 30
+
+
+def sync_interval() -> float:
+    return float(os.getenv("ORION_CALENDAR_SYNC_INTERVAL") or SYNC_INTERVAL)
+
+
+def sync_lookback_days() -> int:
+    return int(os.getenv("ORION_CALENDAR_SYNC_LOOKBACK_DAYS") or SYNC_LOOKBACK_DAYS)
+
+# Taille de page maximale autorisée par l'API Calendar
+PAGE_SIZE = 2500
+
+
+def _parse_event_time(value: dict) -> datetime.datetime:
+    """Convertit le début ou la fin d'un événement (dateTime ou date) en datetime à l'heure de Paris."""
+    if "dateTime" in value:
+        return datetime.datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00")).astimezone(paris_tz)
+    day = datetime.date.fromisoformat(value["date"])
+    return paris_tz.localize(datetime.datetime.combine(day, datetime.time.min))
+
+
+def event_bounds(event: dict) -> tuple[datetime.datetime, datetime.datetime]:
+    """Retourne le début et la fin d'un événement à l'heure de Paris."""
+    return _parse_event_time(event["start"]), _parse_event_time(event["end"])
+
+
+class _CalendarState:
+    """Événements connus d'un calendrier et état de sa synchronisation."""
+
+    def __init__(self, calendar_id: str):
+        self.calendar_id = calendar_id
+        self.events: dict[str, tuple[datetime.datetime, datetime.datetime, dict]] = {}
+        self.sync_token: str | None = None
+        self.last_sync = 0.0
+        self.sync_lock = threading.Lock()
+
+
+class CalendarStore:
+    """Copie locale des événements des calendriers consultés par Orion."""
+
+    def __init__(self):
+        self._calendars: dict[str, _CalendarState] = {}
+        # Protège les événements en mémoire (sections courtes, jamais pendant un appel réseau)
+        self._lock = threading.Lock()
+
+    def _state(self, calendar_id: str) -> _CalendarState:
+        with self._lock:
+            state = self._calendars.get(calendar_id)
+            if state is None:
+                state = self._calendars[calendar_id] = _CalendarState(calendar_id)
+            return state
+
+    def _apply(self, state: _CalendarState, event: dict):
+        """Applique un événement (créé, modifié ou annulé) ; à appeler sous self._lock."""
+        if event.get("status") == "cancelled" or "start" not in event:
+            state.events.pop(event["id"], None)
+            return
+        start, end = event_bounds(event)
+        state.events[event["id"]] = (start, end, event)
+
+    # Synchronisation avec l'API Calendar
+
+    def _fetch_pages(self, state: _CalendarState, sync_token: str | None):
+        """Parcourt toutes les pages d'événements (appel bloquant)."""
+        page_token = None
+        while True:
+            params = {
+                "calendarId": state.calendar_id,
+                "singleEvents": True,
+                "maxResults": PAGE_SIZE,
+                "fields": CALENDAR_EVENT_LIST_FIELDS,
+            }
+            if sync_token:
+                params["syncToken"] = sync_token
+            else:
+                time_min = datetime.datetime.now(paris_tz) - datetime.timedelta(days=sync_lookback_days())
+                params["timeMin"] = time_min.isoformat()
+            if page_token:
+                params["pageToken"] = page_token
+
+            response = execute_blocking(service["calendar"].events().list(**params), "calendar")
+            yield response
+
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return
+
+    def _full_sync(self, state: _CalendarState):
+        events = []
+        next_sync_token = None
+        for page in self._fetch_pages(state, None):
+            events.extend(page.get("items", []))
+            next_sync_token = page.get("nextSyncToken", next_sync_token)
+
+        with self._lock:
+            state.events.clear()
+            for event in events:
+                self._apply(state, event)
+        state.sync_token = next_sync_token
+        logger.info(f"Calendrier {state.calendar_id} chargé : {len(state.events)} événement(s)")
+
+    def _incremental_sync(self, state: _CalendarState):
+        changes = 0
+        next_sync_token = state.sync_token
+        for page in self._fetch_pages(state, state.sync_token):
+            items = page.get("items", [])
+            with self._lock:
+                for event in items:
+                    self._apply(state, event)
+            changes += len(items)
+            next_sync_token = page.get("nextSyncToken", next_sync_token)
+
+        state.sync_token = next_sync_token
+        if changes:
+            logger.info(f"Calendrier {state.calendar_id} synchronisé : {changes} modification(s)")
+
+    def sync(self, calendar_id: str, force: bool = False):
+        """Synchronise un calendrier (appel bloquant, complet au premier appel puis incrémental)."""
+        state = self._state(calendar_id)
+        with state.sync_lock:
+            if not force and time.monotonic() - state.last_sync < sync_interval():
+                return
+
+            if state.sync_token is None:
+                self._full_sync(state)
+            else:
+                try:
+                    self._incremental_sync(state)
+                except HttpError as e:
+                    # 410 Gone : jeton de synchronisation invalidé, rechargement complet
+                    if e.resp.status != 410:
+                        raise
+                    logger.info(f"Jeton de synchronisation expiré pour {calendar_id}, rechargement complet")
+                    state.sync_token = None
+                    self._full_sync(state)
+
+            state.last_sync = time.monotonic()
+
+    async def refresh(self, calendar_id: str, force: bool = False):
+        """Met à jour un calendrier sans bloquer la boucle d'événements."""
+        await run_blocking("calendar", self.sync, calendar_id, force)
+
+    # Mises à jour locales après les écritures faites par Orion
+
+    def upsert(self, calendar_id: str, event: dict):
+        """Ajoute ou remplace un événement dans le cache local."""
+        state = self._state(calendar_id)
+        with self._lock:
+            self._apply(state, event)
+
+    def remove(self, calendar_id: str, event_id: str):
+        """Retire un événement du cache local."""
+        state = self._state(calendar_id)
+        with self._lock:
+            state.events.pop(event_id, None)
+
+    # Lecture
+
+    def iter_events(
+        self,
+        calendar_id: str,
+        time_min: datetime.datetime,
+        time_max: datetime.datetime,
+        private_properties: dict[str, str] | None = None,
+    ) -> Iterator[dict]:
+        """
+        Parcourt les événements qui chevauchent la plage [time_min, time_max], par ordre de début.
+
+        Seules les clés de tri sont copiées sous le verrou ; chaque événement est lu au moment
+        où il est produit (ceux supprimés entre-temps sont ignorés).
+
+        Args:
+            private_properties (dict): Filtre sur extendedProperties.private, chaque clé devant
+                avoir exactement la valeur donnée (même sémantique que privateExtendedProperty)
+        """
+        filters = (private_properties or {}).items()
+        state = self._state(calendar_id)
+        with self._lock:
+            matching = [
+                (start, event_id)
+                for event_id, (start, end, event) in state.events.items()
+                if start < time_max and end > time_min
+                and all(
+                    event.get("extendedProperties", {}).get("private", {}).get(key) == value
+                    for key, value in filters
+                )
+            ]
+        matching.sort()
+
+        for _, event_id in matching:
+            with self._lock:
+                entry = state.events.get(event_id)
+            if entry is not None:
+                yield entry[2]
+
+    def events(
+        self,
+        calendar_id: str,
+        time_min: datetime.datetime,
+        time_max: datetime.datetime,
+        private_properties: dict[str, str] | None = None,
+    ) -> list[dict]:
+        """Retourne les événements qui chevauchent la plage [time_min, time_max], triés par début."""
+        return list(self.iter_events(calendar_id, time_min, time_max, private_properties))
+
+calendar_store = CalendarStore()
@@ -0,0 +1,242 @@
+"""Annuaire local des contacts Google, synchronisé de façon incrémentale.
+
+Un premier chargement complet (toutes les pages de people/me) est suivi de
+synchronisations incrémentales via le syncToken de l'API People. Les contacts
+sont indexés en mémoire par prénom, nom, surnom et email : une recherche ne
+coûte plus le téléchargement de tout le carnet d'adresses.
+"""
+from __future__ import annotations
+
+import os
+import time
+import logging
+import threading
+from collections import defaultdict
+
+from googleapiclient.errors import HttpError
+
+from orion.services.google.auth import service
+from orion.services.google.executor import execute_blocking, run_blocking
+from orion.services.google.fields import PERSON_FIELDS, PERSON_LIST_FIELDS
+from orion.utils.fuzzy import FuzzyIndex
+
+logger = logging.getLogger(__name__)
+
+# Taille de page maximale autorisée par l'API People
+PAGE_SIZE = 1000
+
+# Intervalle minimal (en secondes) entre deux synchronisations incrémentales
+# (ORION_CONTACTS_SYNC_INTERVAL, lu à chaque synchronisation : le .env est chargé après l'import)
+SYNC_INTERVAL = 30.0
+
+
+def sync_interval() -> float:
+    return float(os.getenv("ORION_CONTACTS_SYNC_INTERVAL") or SYNC_INTERVAL)
+
+
+def _normalize(value: str | None) -> str:
+    return (value or "").strip().lower()
+
+
+class ContactDirectory:
+    """Copie locale indexée des contacts de people/me."""
+
+    def __init__(self):
+        self._contacts: dict[str, dict] = {}
+        self._indexes: dict[str, defaultdict[str, set[str]]] = {
+            "given_name": defaultdict(set),
+            "family_name": defaultdict(set),
+            "nickname": defaultdict(set),
+            "email": defaultdict(set),
+        }
+        # Index approximatif pour les noms issus de la transcription vocale
+        self._fuzzy = FuzzyIndex()
+        self._sync_token: str | None = None
+        self._last_sync = 0.0
+        # _lock protège les index (sections courtes), _sync_lock sérialise les synchronisations réseau
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    # Indexation
+
+    @staticmethod
+    def _keys(person: dict) -> dict[str, set[str]]:
+        """Retourne les clés d'index d'un contact."""
+        return {
+            "given_name": {_normalize(n.get("givenName")) for n in person.get("names", []) if n.get("givenName")},
+            "family_name": {_normalize(n.get("familyName")) for n in person.get("names", []) if n.get("familyName")},
+            "nickname": {_normalize(n.get("value")) for n in person.get("nicknames", []) if n.get("value")},
+            "email": {_normalize(e.get("value")) for e in person.get("emailAddresses", []) if e.get("value")},
+        }
+
+    def _unindex(self, resource_name: str):
+        person = self._contacts.pop(resource_name, None)
+        if person is None:
+            return
+        self._fuzzy.remove(resource_name)
+        for index_name, keys in self._keys(person).items():
+            index = self._indexes[index_name]
+            for key in keys:
+                index[key].discard(resource_name)
+                if not index[key]:
+                    del index[key]
+
+    def _index(self, person: dict):
+        resource_name = person["resourceName"]
+        self._unindex(resource_name)
+        self._contacts[resource_name] = person
+        for index_name, keys in self._keys(person).items():
+            for key in keys:
+                self._indexes[index_name][key].add(resource_name)
+
+        names = [n.get(field) for n in person.get("names", []) for field in ("givenName", "familyName")]
+        names += [n.get("value") for n in person.get("nicknames", [])]
+        self._fuzzy.add(resource_name, [name for name in names if name])
+
+    def _clear(self):
+        self._contacts.clear()
+        for index in self._indexes.values():
+            index.clear()
+        self._fuzzy.clear()
+
+    # Synchronisation avec l'API People
+
+    def _fetch_pages(self, sync_token: str | None):
+        """Parcourt toutes les pages de connexions (appel bloquant)."""
+        page_token = None
+        while True:
+            params = {
+                "resourceName": "people/me",
+                "personFields": PERSON_FIELDS,
+                "pageSize": PAGE_SIZE,
+                "requestSyncToken": True,
+                "fields": PERSON_LIST_FIELDS,
+            }
+            if sync_token:
+                params["syncToken"] = sync_token
+            if page_token:
+                params["pageToken"] = page_token
+
+            response = execute_blocking(service["people"].people().connections().list(**params), "people")
+            yield response
+
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return
+
+    def _full_sync(self):
+        contacts = []
+        next_sync_token = None
+        for page in self._fetch_pages(None):
+            contacts.extend(page.get("connections", []))
+            next_sync_token = page.get("nextSyncToken", next_sync_token)
+
+        with self._lock:
+            self._clear()
+            for person in contacts:
+                self._index(person)
+        self._sync_token = next_sync_token
+        logger.info(f"Annuaire des contacts chargé : {len(self._contacts)} contact(s)")
+
+    def _incremental_sync(self):
+        changes = 0
+        next_sync_token = self._sync_token
+        for page in self._fetch_pages(self._sync_token):
+            with self._lock:
+                for person in page.get("connections", []):
+                    changes += 1
+                    if person.get("metadata", {}).get("deleted"):
+                        self._unindex(person["resourceName"])
+                    else:
+                        self._index(person)
+            next_sync_token = page.get("nextSyncToken", next_sync_token)
+
+        self._sync_token = next_sync_token
+        if changes:
+            logger.info(f"Annuaire des contacts synchronisé : {changes} modification(s)")
+
+    def sync(self, force: bool = False):
+        """Synchronise l'annuaire (appel bloquant, complet au premier appel puis incrémental)."""
+        with self._sync_lock:
+            if not force and time.monotonic() - self._last_sync < sync_interval():
+                return
+
+            if self._sync_token is None:
+                self._full_sync()
+            else:
+                try:
+                    self._incremental_sync()
+                except HttpError as e:
+                    # Jeton de synchronisation expiré (7 jours) : rechargement complet
+                    if e.resp.status not in (400, 410):
+                        raise
+                    logger.info(f"Jeton de synchronisation des contacts expiré, rechargement complet : {e}")
+                    self._sync_token = None
+                    self._full_sync()
+
+            self._last_sync = time.monotonic()
+
+    async def refresh(self, force: bool = False):
+        """Met à jour l'annuaire sans bloquer la boucle d'événements."""
+        await run_blocking("people", self.sync, force)
+
+    # Mises à jour locales après les écritures faites par Orion
+
+    def upsert(self, person: dict):
+        """Ajoute ou remplace un contact dans l'annuaire local."""
+        if person and person.get("resourceName"):
+            with self._lock:
+                self._index(person)
+
+    def remove(self, resource_name: str):
+        """Retire un contact de l'annuaire local."""
+        with self._lock:
+            self._unindex(resource_name)
+
+    # Recherche
+
+    def find(
+        self,
+        given_name: str | None = None,
+        family_name: str | None = None,
+        nickname: str | None = None,
+        email: str | None = None,
+    ) -> list[dict]:
+        """
+        Retourne les contacts correspondant exactement (sans tenir compte de la casse) à tous les critères.
+        Sans critère, retourne tous les contacts.
+        """
+        criteria = {
+            "given_name": given_name,
+            "family_name": family_name,
+            "nickname": nickname,
+            "email": email,
+        }
+
+        with self._lock:
+            matches = None
+            for index_name, value in criteria.items():
+                if not value:
+                    continue
+                found = self._indexes[index_name].get(_normalize(value), set())
+                matches = set(found) if matches is None else matches & found
+                if not matches:
+                    return []
+
+            if matches is None:
+                return list(self._contacts.values())
+            return [self._contacts[resource_name] for resource_name in sorted(matches)]
+
+    def search(self, query: str, limit: int = 5) -> list[tuple[dict, float]]:
+        """Retourne les contacts dont le nom ressemble le plus à la requête, avec leur score."""
+        with self._lock:
+            return [
+                (self._contacts[resource_name], score)
+                for resource_name, score in self._fuzzy.search(query, limit=limit)
+            ]
+
+    def __len__(self):
+        return len(self._contacts)
+
+
+contact_directory = ContactDirectory()
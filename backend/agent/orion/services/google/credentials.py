@@ -0,0 +1,199 @@
+"""
+Identifiants Google partagés par tous les services et toutes les sessions du processus.
+
+Deux modes :
+- compte de service (GOOGLE_SERVICE_ACCOUNT_PATH ou secrets/service_account.json), sans interaction,
+  avec délégation à GOOGLE_DELEGATED_USER pour agir sur sa boîte mail, son agenda et ses contacts ;
+- utilisateur OAuth (secrets/token.json), le flux interactif n'étant lancé que depuis un terminal.
+
+Un thread d'arrière-plan rafraîchit le jeton d'accès avant son expiration : les appels des outils
+ne paient jamais l'aller-retour de rafraîchissement. Le jeton utilisateur est réécrit atomiquement.
+
+Connexion initiale (crée token.json) : python -m orion.services.google.credentials
+"""
+import os
+import sys
+import logging
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+from google.auth.exceptions import RefreshError, TransportError
+from google.auth.transport.requests import Request
+from google.oauth2 import service_account
+from google.oauth2.credentials import Credentials
+
+from orion.utils.paths import get_credentials_path, get_service_account_path, get_token_path
+
+logger = logging.getLogger(__name__)
+
+#If you modify these scopes, delete the file token.json.
+SCOPES = ["https://www.googleapis.com/auth/calendar",
+          "https://mail.google.com/",
+          "https://www.googleapis.com/auth/gmail.send",
+          "https://www.googleapis.com/auth/gmail.modify",
+          "https://www.googleapis.com/auth/contacts",
+]
+
+# Le jeton est rafraîchi quand il lui reste moins que cette marge (secondes).
+# Supérieure au seuil de google-auth (~4 min) pour qu'aucun appel ne rafraîchisse lui-même.
+REFRESH_MARGIN = 10 * 60
+
+# Délai avant une nouvelle tentative après un échec de rafraîchissement (secondes)
+RETRY_DELAY = 30
+MAX_RETRY_DELAY = 10 * 60
+
+
+def write_token(path, creds):
+    """Écrit le jeton utilisateur de façon atomique (fichier temporaire puis remplacement)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".token-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as token:
+            token.write(creds.to_json())
+            token.flush()
+            os.fsync(token.fileno())
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class CredentialManager:
+    """
+    Charge les identifiants une fois par processus et les maintient valides en arrière-plan.
+
+    Les services Google reçoivent tous le même objet d'identifiants : un rafraîchissement
+    le met à jour en place pour tous.
+    """
+
+    def __init__(self, interactive=None):
+        self._credentials = None
+        self._lock = threading.RLock()
+        self._thread = None
+        self._wakeup = threading.Event()
+        # Flux OAuth interactif autorisé seulement depuis un terminal (jamais dans un worker headless)
+        self.interactive = sys.stdin is not None and sys.stdin.isatty() if interactive is None else interactive
+
+    @property
+    def credentials(self):
+        if self._credentials is None:
+            with self._lock:
+                if self._credentials is None:
+                    self._credentials = self._load()
+                    self._start_refresher()
+        return self._credentials
+
+    @property
+    def is_service_account(self):
+        return isinstance(self._credentials, service_account.Credentials)
+
+    # Chargement
+
+    def _load(self):
+        key_path = get_service_account_path()
+        if key_path:
+            creds = service_account.Credentials.from_service_account_file(str(key_path), scopes=SCOPES)
+            delegated_user = os.getenv("GOOGLE_DELEGATED_USER")
+            if delegated_user:
+                creds = creds.with_subject(delegated_user)
+            creds.refresh(Request())
+            logger.info(f"Authentification Google par compte de service ({creds.service_account_email}).")
+            return creds
+
+        token_path = str(get_token_path())
+        creds = None
+        if os.path.exists(token_path):
+            creds = Credentials.from_authorized_user_file(token_path, SCOPES)
+
+        if creds and creds.valid:
+            logger.info("Authentification Google réussie.")
+            return creds
+
+        if creds and creds.refresh_token:
+            try:
+                creds.refresh(Request())
+                write_token(token_path, creds)
+                logger.info("Authentification Google réussie (jeton rafraîchi).")
+                return creds
+            except RefreshError as e:
+                logger.warning(f"Le jeton est invalide ou révoqué ({e}).")
+
+        return self._login(token_path)
+
+    def _login(self, token_path):
+        """Flux OAuth interactif (navigateur) : crée token.json."""
+        if not self.interactive:
+            raise RuntimeError(
+                f"Aucun jeton Google valide ({token_path}) et flux interactif impossible dans ce processus : "
+                "lancez `python -m orion.services.google.credentials` depuis un terminal "
+                "ou configurez un compte de service (GOOGLE_SERVICE_ACCOUNT_PATH)."
+            )
+
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
+        flow = InstalledAppFlow.from_client_secrets_file(str(get_credentials_path()), SCOPES)
+        creds = flow.run_local_server(port=0)
+        write_token(token_path, creds)
+        logger.info("Authentification Google réussie (nouveau jeton).")
+        return creds
+
+    # Rafraîchissement en arrière-plan
+
+    def _seconds_until_refresh(self):
+        expiry = self._credentials.expiry
+        if expiry is None:
+            return REFRESH_MARGIN
+        # google-auth exprime l'expiration en UTC naïf
+        remaining = (expiry.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)).total_seconds()
+        return max(0.0, remaining - REFRESH_MARGIN)
+
+    def refresh(self):
+        """Rafraîchit le jeton d'accès maintenant (et persiste le jeton utilisateur)."""
+        with self._lock:
+            self._credentials.refresh(Request())
+            if not self.is_service_account:
+                write_token(str(get_token_path()), self._credentials)
+        logger.info(f"Jeton Google rafraîchi, valide jusqu'à {self._credentials.expiry:%H:%M:%S} UTC.")
+
+    def _start_refresher(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop, name="google-credentials", daemon=True)
+            self._thread.start()
+
+    def _refresh_loop(self):
+        retry_delay = RETRY_DELAY
+        delay = self._seconds_until_refresh()
+        while True:
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+            try:
+                self.refresh()
+                retry_delay = RETRY_DELAY
+                delay = self._seconds_until_refresh()
+            except (RefreshError, TransportError) as e:
+                # Le jeton courant reste utilisable jusqu'à son expiration : on réessaie plus tard
+                logger.error(f"Échec du rafraîchissement du jeton Google : {e}. Nouvelle tentative dans {retry_delay}s.")
+                delay = retry_delay
+                retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
+            except Exception as e:
+                logger.exception(f"Erreur inattendue lors du rafraîchissement du jeton Google : {e}")
+                delay = retry_delay
+
+    def request_refresh(self):
+        """Demande un rafraîchissement immédiat au thread d'arrière-plan."""
+        self._wakeup.set()
+
+
+credential_manager = CredentialManager()
+
+
+if __name__ == "__main__":
+    # Connexion initiale depuis un terminal : crée ou renouvelle token.json
+    logging.basicConfig(level=logging.INFO)
+    manager = CredentialManager(interactive=True)
+    creds = manager.credentials
+    print(f"Identifiants Google prêts, jeton valide jusqu'à {creds.expiry} UTC.")
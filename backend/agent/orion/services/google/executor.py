@@ -0,0 +1,180 @@
+"""Exécution non bloquante des requêtes Google API.
+
+Les clients googleapiclient sont synchrones : un appel direct à `.execute()`
+depuis une fonction `async` bloque la boucle d'événements LiveKit (et donc
+l'audio temps réel) pendant tout l'aller-retour HTTP. Toutes les fonctions de
+l'assistant passent par `execute()`, qui déporte l'appel dans un pool de
+threads borné, avec une limite de concurrence par service et un délai maximal.
+Chaque thread du pool utilise son propre transport HTTP (voir transport.py) et
+respecte le débit autorisé par API, avec nouvelles tentatives (voir ratelimit.py).
+"""
+from __future__ import annotations
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from orion.utils.metrics import (
+    GOOGLE_REQUEST_DURATION,
+    GOOGLE_REQUESTS,
+    GOOGLE_RESPONSE_BYTES,
+    GOOGLE_RETRIES,
+    error_status,
+)
+from orion.services.google.ratelimit import is_retryable, limiter, retry_delay, wait_before_retry
+from orion.services.google.transport import transport
+
+logger = logging.getLogger(__name__)
+
+# Valeurs par défaut, surchargeables par l'environnement. Elles sont lues au premier
+# usage, et non à l'import : le .env de l'agent est chargé après l'import de ce module.
+
+# Taille du pool partagé par toutes les sessions du processus (ORION_GOOGLE_MAX_WORKERS)
+MAX_WORKERS = 16
+
+# Délai maximal (en secondes) d'un appel Google API (ORION_GOOGLE_TIMEOUT)
+DEFAULT_TIMEOUT = 15.0
+
+# Nombre maximal d'appels simultanés par service (ORION_<API>_CONCURRENCY)
+SERVICE_LIMITS = {
+    "calendar": 8,
+    "gmail": 4,
+    "people": 4,
+}
+DEFAULT_LIMIT = 4
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+# Les sémaphores asyncio sont liés à une boucle : un jeu par boucle d'événements
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def default_timeout() -> float:
+    """Délai maximal d'un appel Google API (secondes)."""
+    return float(os.getenv("ORION_GOOGLE_TIMEOUT") or DEFAULT_TIMEOUT)
+
+
+def service_limit(api: str) -> int:
+    """Nombre maximal d'appels simultanés au service."""
+    return int(os.getenv(f"ORION_{api.upper()}_CONCURRENCY") or SERVICE_LIMITS.get(api, DEFAULT_LIMIT))
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Retourne le pool partagé, créé au premier appel."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                max_workers = int(os.getenv("ORION_GOOGLE_MAX_WORKERS") or MAX_WORKERS)
+                _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="orion-google")
+    return _executor
+
+
+def _get_semaphore(api: str) -> asyncio.Semaphore:
+    """Retourne le sémaphore du service pour la boucle courante."""
+    loop = asyncio.get_running_loop()
+    per_loop = _semaphores.setdefault(loop, {})
+    if api not in per_loop:
+        per_loop[api] = asyncio.Semaphore(service_limit(api))
+    return per_loop[api]
+
+
+async def run_blocking(api: str, fnc, *args, timeout: float | None = None):
+    """Exécute une fonction bloquante liée à un service Google dans le pool."""
+    timeout = default_timeout() if timeout is None else timeout
+    loop = asyncio.get_running_loop()
+
+    semaphore = _get_semaphore(api)
+    await semaphore.acquire()
+    try:
+        future = loop.run_in_executor(_get_executor(), lambda: fnc(*args))
+    except BaseException:
+        semaphore.release()
+        raise
+
+    def release(done):
+        # Le permis est rendu quand le thread a fini, pas quand l'appelant abandonne :
+        # la limite compte les appels réellement en cours
+        semaphore.release()
+        if not done.cancelled():
+            done.exception()  # Résultat d'un appel abandonné : évite l'avertissement d'exception non lue
+
+    future.add_done_callback(release)
+    try:
+        # shield : un délai dépassé ou une annulation n'annule pas le futur, qui rend le permis à la fin du thread
+        return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+    except asyncio.TimeoutError:
+        # Le thread termine l'appel en arrière-plan, mais on rend la main à l'agent
+        logger.error(f"Délai dépassé pour l'appel {api} ({timeout}s)")
+        raise TimeoutError(f"Délai dépassé pour l'appel {api} ({timeout}s)") from None
+
+
+def measure_response_size(request, api: str):
+    """Comptabilise la taille des réponses d'une requête, y compris exécutée dans un lot batch."""
+    postproc = request.postproc
+    method = getattr(request, "methodId", None) or "unknown"
+
+    def counted(resp, content):
+        GOOGLE_RESPONSE_BYTES.labels(api=api, method=method).inc(len(content or b""))
+        return postproc(resp, content)
+
+    request.postproc = counted
+    return request
+
+
+def execute_blocking(request, api: str, timeout: float | None = None):
+    """
+    Exécute une requête dans le thread courant (avec son transport) en mesurant durée, résultat et octets reçus.
+    Attend son jeton de débit et relance les réponses de limitation (429/403) ou, pour une lecture,
+    les erreurs serveur transitoires, tant que le délai de l'appel le permet.
+    """
+    method = getattr(request, "methodId", None) or "unknown"
+    measure_response_size(request, api)
+    bucket = limiter.bucket(api)
+    deadline = time.monotonic() + (default_timeout() if timeout is None else timeout)
+
+    attempt = 0
+    while True:
+        bucket.acquire(deadline=deadline)
+        started = time.perf_counter()
+        try:
+            response = request.execute(http=transport.http())
+        except Exception as e:
+            GOOGLE_REQUEST_DURATION.labels(api=api, method=method).observe(time.perf_counter() - started)
+            GOOGLE_REQUESTS.labels(api=api, method=method, status=error_status(e)).inc()
+            delay = retry_delay(e, attempt, deadline) if is_retryable(e, request.method) else None
+            if delay is None:
+                raise
+            logger.warning(f"Appel {api} {method} en échec ({error_status(e)}), nouvelle tentative dans {delay:.1f}s")
+            GOOGLE_RETRIES.labels(api=api, method=method).inc()
+            wait_before_retry(e, delay, bucket)
+            attempt += 1
+            continue
+
+        GOOGLE_REQUEST_DURATION.labels(api=api, method=method).observe(time.perf_counter() - started)
+        GOOGLE_REQUESTS.labels(api=api, method=method, status="ok").inc()
+        return response
+
+
+async def execute(request, api: str, timeout: float | None = None):
+    """
+    Exécute une requête googleapiclient sans bloquer la boucle d'événements.
+
+    Args:
+        request: Requête construite (ex: service['calendar'].events().list(...))
+        api (str): Service concerné ('calendar', 'gmail' ou 'people')
+        timeout (float): Délai maximal en secondes (par défaut: ORION_GOOGLE_TIMEOUT)
+    """
+    try:
+        return await run_blocking(api, execute_blocking, request, api, timeout, timeout=timeout)
+    except TimeoutError:
+        # L'appel continue dans son thread : le délai dépassé est compté à part
+        GOOGLE_REQUESTS.labels(api=api, method=getattr(request, "methodId", None) or "unknown", status="timeout").inc()
+        raise
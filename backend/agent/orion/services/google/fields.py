@@ -0,0 +1,45 @@
+"""Masques de réponse partielle (paramètre `fields`) des appels aux API Google.
+
+Chaque appel ne demande que les champs réellement lus par Orion : les
+réponses sont plus légères à transférer et à décoder. Un champ lu par un
+nouvel outil doit être ajouté ici, sinon il sera absent de la réponse.
+"""
+
+# Google Calendar
+
+# Événement tel que conservé par le cache local (lectures, créneaux libres, liens)
+CALENDAR_EVENT_FIELDS = "id,status,summary,description,start,end,transparency,extendedProperties,htmlLink"
+
+# Pages de events().list pour la synchronisation (syncToken)
+CALENDAR_EVENT_LIST_FIELDS = f"nextPageToken,nextSyncToken,items({CALENDAR_EVENT_FIELDS})"
+
+# Abonnement aux notifications push (events().watch)
+CALENDAR_WATCH_FIELDS = "resourceId,expiration"
+
+# Gmail
+
+# Brouillon créé : seul l'identifiant est utilisé
+GMAIL_DRAFT_FIELDS = "id,message/id"
+
+# Recherche de brouillons : identifiants du brouillon et de son message
+GMAIL_DRAFT_LIST_FIELDS = "drafts(id,message/id)"
+
+# Message lu au format metadata : seuls les en-têtes demandés
+GMAIL_MESSAGE_HEADERS_FIELDS = "id,payload/headers"
+
+# Message envoyé (messages().send ou drafts().send)
+GMAIL_SENT_MESSAGE_FIELDS = "id"
+
+# Google People
+
+# Sections d'un contact demandées à l'API (personFields)
+PERSON_FIELDS = "names,nicknames,biographies,emailAddresses,phoneNumbers,metadata"
+
+# Sous-champs lus dans ces sections (metadata ne sert qu'à détecter les suppressions)
+PERSON_MASK = (
+    "resourceName,etag,names(givenName,familyName),nicknames(value),"
+    "biographies(value,contentType),emailAddresses(value),phoneNumbers(value),metadata(deleted)"
+)
+
+# Pages de connections().list pour la synchronisation (syncToken)
+PERSON_LIST_FIELDS = f"nextPageToken,nextSyncToken,connections({PERSON_MASK})"
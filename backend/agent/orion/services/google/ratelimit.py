@@ -0,0 +1,197 @@
+"""Limitation de débit et nouvelles tentatives des appels aux API Google.
+
+Google applique des quotas par utilisateur et par API : une rafale de
+signalements simultanés provoque des réponses 429 ou 403 (rateLimitExceeded).
+Chaque couple (API, utilisateur) dispose d'un seau à jetons partagé par tous
+les threads du processus : les appels attendent leur jeton au lieu de partir
+en rafale. Une réponse de limitation met le seau en pause pour tous (la durée
+de `Retry-After` ou, à défaut, un backoff exponentiel avec gigue), puis la
+requête est relancée.
+"""
+from __future__ import annotations
+
+import os
+import json
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+
+from googleapiclient.errors import HttpError
+
+logger = logging.getLogger(__name__)
+
+# Débit soutenu (requêtes/s) et rafale maximale par API et par utilisateur, par défaut
+# sous les quotas de Google (Calendar ~600/min, Gmail 250 unités/s, People 90/min).
+# Surchargeables par ORION_<API>_RATE et ORION_<API>_BURST (lus à la création du seau)
+RATE_LIMITS = {
+    "calendar": (8.0, 20),
+    "gmail": (5.0, 10),
+    "people": (1.5, 10),
+}
+DEFAULT_RATE_LIMIT = (5.0, 10)
+
+# Nouvelles tentatives : nombre maximal (surchargeable par ORION_GOOGLE_MAX_RETRIES)
+# et backoff exponentiel (secondes) avant gigue
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# Raisons d'un 403 qui signalent une limitation de débit (et non un refus d'accès ou un quota journalier épuisé)
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "RATE_LIMIT_EXCEEDED"}
+
+# Erreurs serveur transitoires, relancées seulement pour les lectures (une écriture a pu aboutir)
+TRANSIENT_STATUSES = {500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Seau à jetons thread-safe : `rate` jetons par seconde, au plus `burst` en réserve."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, count: float) -> float:
+        """Réserve `count` jetons et retourne l'attente nécessaire avant de les utiliser."""
+        with self._lock:
+            now = time.monotonic()
+            # Pas de remplissage pendant une pause
+            self._tokens = min(self.burst, self._tokens + max(0.0, now - self._updated) * self.rate)
+            self._updated = max(now, self._updated)
+            # Les jetons manquants sont empruntés : les appelants suivants attendent d'autant plus
+            self._tokens -= count
+            deficit = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(0.0, self._paused_until - now) + deficit
+
+    def release(self, count: int):
+        """Rend des jetons réservés mais non utilisés."""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + count)
+
+    def acquire(self, count: int = 1, deadline: float | None = None):
+        """Attend (en bloquant le thread) que `count` jetons soient disponibles."""
+        count = min(count, self.burst)
+        wait = self._reserve(count)
+        if deadline is not None and time.monotonic() + wait > deadline:
+            # L'appel est abandonné sans consommer de quota
+            self.release(count)
+            raise TimeoutError("Quota Google : attente au-delà du délai de l'appel")
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, delay: float):
+        """Suspend le seau pour tous les appelants (réponse de limitation reçue) et vide sa réserve."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._updated = max(self._updated, self._paused_until)
+            self._tokens = min(self._tokens, 0.0)
+
+
+def rate_limit(api: str) -> tuple[float, int]:
+    """Débit et rafale d'une API, depuis l'environnement ou les valeurs par défaut."""
+    rate, burst = RATE_LIMITS.get(api, DEFAULT_RATE_LIMIT)
+    prefix = f"ORION_{api.upper()}"
+    return float(os.getenv(f"{prefix}_RATE") or rate), int(os.getenv(f"{prefix}_BURST") or burst)
+
+
+def max_retries() -> int:
+    return int(os.getenv("ORION_GOOGLE_MAX_RETRIES") or MAX_RETRIES)
+
+
+class RateLimiter:
+    """Seaux à jetons par (API, utilisateur), créés au premier usage."""
+
+    def __init__(self, limits=None):
+        # Sans limites explicites, chaque seau lit sa configuration à sa création (après le .env)
+        self.limits = limits
+        self._buckets: dict[tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, api: str, user: str | None = None) -> TokenBucket:
+        key = (api, user or current_user())
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    limits = self.limits.get(api, DEFAULT_RATE_LIMIT) if self.limits else rate_limit(api)
+                    bucket = self._buckets[key] = TokenBucket(*limits)
+        return bucket
+
+
+def current_user() -> str:
+    """Utilisateur au nom duquel les appels sont faits (quotas Google par utilisateur)."""
+    return os.getenv("GOOGLE_DELEGATED_USER") or "me"
+
+
+def _error_reasons(error: HttpError) -> set[str]:
+    """Raisons détaillées d'une erreur Google (`errors[].reason` et `details[].reason`)."""
+    try:
+        data = json.loads(error.content.decode("utf-8"))["error"]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return set()
+    entries = (data.get("errors") or []) + (data.get("details") or [])
+    return {entry.get("reason") for entry in entries if isinstance(entry, dict)}
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Réponse de limitation de débit : 429, ou 403 avec une raison de type rateLimitExceeded."""
+    if not isinstance(error, HttpError):
+        return False
+    status = error.resp.status
+    return status == 429 or (status == 403 and bool(_error_reasons(error) & RATE_LIMIT_REASONS))
+
+
+def is_retryable(error: BaseException, method: str = "GET") -> bool:
+    """Erreur à relancer : limitation de débit, ou erreur serveur transitoire sur une lecture."""
+    if is_rate_limited(error):
+        return True
+    return isinstance(error, HttpError) and error.resp.status in TRANSIENT_STATUSES and method == "GET"
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Délai demandé par l'en-tête Retry-After (secondes ou date HTTP), s'il est présent."""
+    resp = getattr(error, "resp", None)
+    value = resp.get("retry-after") if resp is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, error: BaseException | None = None) -> float:
+    """Attente avant la tentative suivante : Retry-After si fourni, sinon backoff exponentiel à gigue complète."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    requested = retry_after(error) if error is not None else None
+    return max(delay, requested) if requested is not None else delay
+
+
+def retry_delay(error: BaseException, attempt: int, deadline: float) -> float | None:
+    """Attente avant la tentative suivante, ou None si les tentatives ou le délai de l'appel sont épuisés."""
+    if attempt >= max_retries():
+        return None
+    delay = backoff_delay(attempt, error)
+    return None if time.monotonic() + delay > deadline else delay
+
+
+def wait_before_retry(error: BaseException, delay: float, bucket: TokenBucket):
+    """Attend avant de relancer : une limitation de débit suspend le seau pour tous les appelants."""
+    if is_rate_limited(error):
+        # La prochaine acquisition attendra la fin de la pause
+        bucket.pause(delay)
+    else:
+        time.sleep(delay)
+
+
+limiter = RateLimiter()
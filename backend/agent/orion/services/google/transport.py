@@ -0,0 +1,64 @@
+"""Transport HTTP des requêtes Google API : une connexion keep-alive par thread.
+
+httplib2.Http (utilisé par googleapiclient) n'est pas thread-safe : partagé
+entre les threads du pool, deux appels simultanés s'entremêlent sur la même
+connexion. Chaque thread reçoit donc son propre AuthorizedHttp, créé au
+premier appel puis réutilisé : la connexion TLS vers Google reste ouverte
+entre les appels du thread au lieu d'être renégociée à chaque rafale.
+Les identifiants, eux, restent partagés (voir credentials.py).
+"""
+from __future__ import annotations
+
+import os
+import logging
+import threading
+
+import httplib2
+import google_auth_httplib2
+
+logger = logging.getLogger(__name__)
+
+# Délai réseau par défaut (en secondes) d'une lecture ou d'une connexion,
+# surchargeable par ORION_GOOGLE_SOCKET_TIMEOUT (lu à la création de chaque transport)
+SOCKET_TIMEOUT = 30.0
+
+
+def socket_timeout() -> float:
+    return float(os.getenv("ORION_GOOGLE_SOCKET_TIMEOUT") or SOCKET_TIMEOUT)
+
+
+def authorized_http():
+    """Transport par défaut : httplib2 authentifié avec les identifiants partagés du processus."""
+    from orion.services.google.credentials import credential_manager
+
+    return google_auth_httplib2.AuthorizedHttp(
+        credential_manager.credentials,
+        http=httplib2.Http(timeout=socket_timeout()),
+    )
+
+
+class ThreadLocalTransport:
+    """Fournit à chaque thread son transport HTTP, conservé pour toute la vie du thread."""
+
+    def __init__(self, factory=authorized_http):
+        self._factory = factory
+        self._local = threading.local()
+        # Incrémenté à chaque changement de fabrique : les threads recréent alors leur transport
+        self._generation = 0
+
+    def http(self):
+        """Retourne le transport du thread courant (créé au premier appel)."""
+        local = self._local
+        if getattr(local, "generation", None) != self._generation:
+            local.http = self._factory()
+            local.generation = self._generation
+            logger.debug(f"Transport Google créé pour le thread {threading.current_thread().name}")
+        return local.http
+
+    def set_factory(self, factory):
+        """Remplace la fabrique de transport (ex: client non authentifié vers une fausse API)."""
+        self._factory = factory
+        self._generation += 1
+
+
+transport = ThreadLocalTransport()
@@ -5,17 +5,25 @@ import pytz
 # Timezone Paris
 paris_tz = pytz.timezone("Europe/Paris")
 
-# Dates clés calculées au chargement
-now = datetime.datetime.now(paris_tz)
-aujourdhui = now.date()
-demain = aujourdhui + timedelta(days=1)
-apres_demain = aujourdhui + timedelta(days=2)
-hier = aujourdhui + timedelta(days=-1)
-avanthier = aujourdhui + timedelta(days=-2)
+JOURS = ("lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche")
+
+
+def dates_cles(now=None):
+    """
+    Dates clés relatives au jour courant à Paris.
+    Calculées à chaque appel : un worker tourne plusieurs jours, des dates figées au chargement deviendraient fausses.
+    """
+    aujourdhui = (now or datetime.datetime.now(paris_tz)).astimezone(paris_tz).date()
+    return {
+        "aujourdhui": aujourdhui,
+        "demain": aujourdhui + timedelta(days=1),
+        "apres_demain": aujourdhui + timedelta(days=2),
+        "hier": aujourdhui + timedelta(days=-1),
+        "avanthier": aujourdhui + timedelta(days=-2),
+    }
+
 
 # Heures pratiques
 midi = "12:00"
 minuit = "00:00"
 fiftynine = "23:59"
-
-
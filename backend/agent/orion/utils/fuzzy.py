@@ -0,0 +1,192 @@
+"""Recherche approximative de noms, tolérante aux erreurs de transcription vocale.
+
+Les noms arrivent de la reconnaissance vocale : accents perdus, graphies
+homophones (Stéphane / Stefan, Philippe / Filip), lettres doublées. L'index
+combine trois clés précalculées :
+- le nom replié (minuscules, sans accents) pour les correspondances exactes,
+- une clé phonétique adaptée aux noms français,
+- les trigrammes pour les fautes de frappe ou de transcription restantes.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Hashable, Iterable
+
+# Score minimal pour qu'un candidat soit retenu
+MIN_SCORE = 0.45
+
+# Part minimale de trigrammes communs pour qu'un mot devienne candidat
+MIN_TRIGRAM_OVERLAP = 0.5
+
+PHONETIC_MATCH_SCORE = 0.9
+
+# Règles de réécriture phonétique, appliquées dans l'ordre sur le nom replié en majuscules
+_PHONETIC_RULES = [
+    (r"SCH", "CH"),
+    (r"CHR", "KR"),
+    (r"CH", "S"),
+    (r"PH", "F"),
+    (r"TH", "T"),
+    (r"CK", "K"),
+    (r"QU", "K"),
+    (r"Q", "K"),
+    (r"UILL", "UI"),
+    (r"G(?=[EIY])", "J"),
+    (r"GU(?=[EIY])", "G"),
+    (r"C(?=[EIY])", "S"),
+    (r"C", "K"),
+    (r"X", "KS"),
+    (r"Z", "S"),
+    (r"W", "V"),
+    (r"Y", "I"),
+    (r"EAU", "O"),
+    (r"AU", "O"),
+    (r"(?:AI|EI)", "E"),
+    (r"(?:EN|AN|EM|AM)(?![AEIOU])", "AN"),
+    (r"(?:ER|EZ|ET)$", "E"),
+    (r"(?<!^)H", ""),
+    (r"^H", ""),
+    (r"([A-Z])\1+", r"\1"),
+    (r"(?<=.)[ESTDX]$", ""),
+]
+_PHONETIC_PATTERNS = [(re.compile(pattern), replacement) for pattern, replacement in _PHONETIC_RULES]
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Mots du texte d'origine, avant repli (lettres accentuées comprises)
+_RAW_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def fold(text: str | None) -> str:
+    """Met en minuscules et retire les accents (Éloïse -> eloise)."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+
+def tokens(text: str | None) -> list[str]:
+    """Découpe un texte replié en mots (les traits d'union séparent les prénoms composés)."""
+    return _WORD_RE.findall(fold(text))
+
+
+def phonetic_key(word: str) -> str:
+    """
+    Retourne une clé phonétique adaptée aux noms français (Stéphane et Stefan -> STEFAN).
+    Le mot est attendu avant repli : la cédille se prononce s (François et Fransoi -> FRANSOI).
+    """
+    key = fold(word.lower().replace("ç", "s")).upper()
+    key = re.sub(r"[^A-Z]", "", key)
+    for pattern, replacement in _PHONETIC_PATTERNS:
+        key = pattern.sub(replacement, key)
+    return key
+
+
+def keyed_tokens(text: str | None) -> list[tuple[str, str]]:
+    """Découpe un texte en mots repliés, chacun avec la clé phonétique de son mot d'origine."""
+    return [(word, phonetic_key(raw)) for raw in _RAW_WORD_RE.findall(text or "") for word in tokens(raw)]
+
+
+def trigrams(word: str) -> set[str]:
+    """Retourne les trigrammes d'un mot, bornés par des espaces pour pondérer début et fin."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(query_word: str, query_key: str, query_grams: set[str], word: str, key: str, grams: set[str]) -> float:
+    if query_word == word:
+        return 1.0
+    if query_key and query_key == key:
+        return PHONETIC_MATCH_SCORE
+    # Coefficient de Dice sur les trigrammes
+    return 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+
+
+class FuzzyIndex:
+    """Index de recherche approximative sur les noms associés à des identifiants."""
+
+    def __init__(self):
+        self._words: dict[Hashable, list[tuple[str, str, frozenset[str]]]] = {}
+        self._by_word: defaultdict[str, set[Hashable]] = defaultdict(set)
+        self._by_phonetic: defaultdict[str, set[Hashable]] = defaultdict(set)
+        self._by_trigram: defaultdict[str, set[Hashable]] = defaultdict(set)
+
+    def add(self, item_id: Hashable, names: Iterable[str]):
+        """Indexe (ou réindexe) les noms d'un élément."""
+        self.remove(item_id)
+
+        words = []
+        for word, key in {pair for name in names for pair in keyed_tokens(name)}:
+            grams = frozenset(trigrams(word))
+            words.append((word, key, grams))
+
+            self._by_word[word].add(item_id)
+            if key:
+                self._by_phonetic[key].add(item_id)
+            for gram in grams:
+                self._by_trigram[gram].add(item_id)
+
+        self._words[item_id] = words
+
+    def remove(self, item_id: Hashable):
+        """Retire un élément de l'index."""
+        for word, key, grams in self._words.pop(item_id, []):
+            self._discard(self._by_word, word, item_id)
+            self._discard(self._by_phonetic, key, item_id)
+            for gram in grams:
+                self._discard(self._by_trigram, gram, item_id)
+
+    @staticmethod
+    def _discard(index: defaultdict, key: str, item_id: Hashable):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(item_id)
+            if not ids:
+                del index[key]
+
+    def clear(self):
+        self._words.clear()
+        self._by_word.clear()
+        self._by_phonetic.clear()
+        self._by_trigram.clear()
+
+    def search(self, query: str, limit: int = 5, min_score: float = MIN_SCORE) -> list[tuple[Hashable, float]]:
+        """
+        Retourne les éléments les plus proches de la requête, triés par score décroissant.
+
+        Chaque mot de la requête est comparé au meilleur mot de l'élément
+        (exact = 1, même clé phonétique = 0.9, sinon similarité des trigrammes),
+        le score final est la moyenne sur les mots de la requête.
+        """
+        query_words = [(w, key, trigrams(w)) for w, key in keyed_tokens(query)]
+        if not query_words:
+            return []
+
+        # Candidats : mot identique ou phonétiquement proche ; à défaut, assez de trigrammes communs
+        candidates: set[Hashable] = set()
+        for word, key, grams in query_words:
+            exact = self._by_word.get(word, set()) | self._by_phonetic.get(key, set())
+            if exact:
+                candidates |= exact
+                continue
+
+            overlap = Counter()
+            for gram in grams:
+                overlap.update(self._by_trigram.get(gram, ()))
+            min_overlap = max(2, int(len(grams) * MIN_TRIGRAM_OVERLAP))
+            candidates.update(item_id for item_id, count in overlap.items() if count >= min_overlap)
+
+        results = []
+        for item_id in candidates:
+            words = self._words[item_id]
+            score = sum(
+                max(_similarity(qw, qk, qg, w, k, g) for w, k, g in words)
+                for qw, qk, qg in query_words
+            ) / len(query_words)
+            if score >= min_score:
+                results.append((item_id, score))
+
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results[:limit]
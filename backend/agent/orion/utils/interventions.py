@@ -0,0 +1,11 @@
+"""Valeurs des métadonnées d'intervention, partagées par l'agent et le serveur."""
+
+
+def normalize_urgence(urgence: str) -> str:
+    """Ramène le niveau d'urgence à 'urgent', 'moyen' ou 'faible'."""
+    urgence_lower = urgence.strip().lower()
+    if urgence_lower in ("urgent", "haute"):
+        return "urgent"
+    if urgence_lower in ("moyen", "moyenne"):
+        return "moyen"
+    return "faible"
@@ -0,0 +1,110 @@
+"""Métriques Prometheus du worker : durée des outils et appels aux API Google.
+
+Le worker LiveKit exécute chaque job dans un processus enfant (spawn) : les
+métriques sont écrites dans un répertoire partagé (mode multiprocessus de
+prometheus_client) et agrégées par le serveur HTTP du processus principal.
+Activé par ORION_METRICS_PORT (ex: 9100) ; désactivé si absent ou à 0.
+"""
+from __future__ import annotations
+
+import os
+import time
+import logging
+import tempfile
+import functools
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, multiprocess, start_http_server
+
+logger = logging.getLogger(__name__)
+
+# Bornes des histogrammes (secondes) : de l'appel en cache au délai maximal d'un appel Google
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0)
+
+TOOL_DURATION = Histogram(
+    "orion_tool_duration_seconds",
+    "Durée d'exécution des outils de l'assistant",
+    ["tool", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+GOOGLE_REQUEST_DURATION = Histogram(
+    "orion_google_request_duration_seconds",
+    "Durée des appels aux API Google (requête simple ou lot batch)",
+    ["api", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+
+GOOGLE_REQUESTS = Counter(
+    "orion_google_requests_total",
+    "Appels aux API Google par méthode et résultat (ok, code HTTP, timeout, error)",
+    ["api", "method", "status"],
+)
+
+GOOGLE_RETRIES = Counter(
+    "orion_google_retries_total",
+    "Nouvelles tentatives d'appels aux API Google",
+    ["api", "method"],
+)
+
+GOOGLE_RESPONSE_BYTES = Counter(
+    "orion_google_response_bytes_total",
+    "Octets reçus des API Google (corps des réponses)",
+    ["api", "method"],
+)
+
+
+def error_status(error: BaseException) -> str:
+    """Libellé de résultat d'un appel en échec : code HTTP si disponible."""
+    resp = getattr(error, "resp", None)
+    if resp is not None and getattr(resp, "status", None):
+        return str(resp.status)
+    if isinstance(error, TimeoutError):
+        return "timeout"
+    return "error"
+
+
+def instrument_tool(name: str, fnc):
+    """Enveloppe un outil async pour mesurer sa durée (status 'error' si exception ou message d'erreur)."""
+    @functools.wraps(fnc)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            result = await fnc(*args, **kwargs)
+            # Les outils retournent leurs erreurs sous forme de message plutôt que de lever
+            if isinstance(result, str) and result.startswith("Erreur"):
+                status = "error"
+            return result
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            TOOL_DURATION.labels(tool=name, status=status).observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+def metrics_port() -> int | None:
+    """Port d'exposition des métriques (ORION_METRICS_PORT, lu après chargement du .env)."""
+    port = int(os.getenv("ORION_METRICS_PORT") or 0)
+    return port or None
+
+
+def start_metrics_server(port: int | None = None):
+    """
+    Démarre l'exposition /metrics agrégée de tous les processus.
+
+    À appeler dans le processus principal avant le démarrage du worker : le répertoire
+    partagé est alors hérité par les processus des jobs, qui importent prometheus_client
+    en mode multiprocessus.
+    """
+    port = port or metrics_port()
+    if not port:
+        return
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="orion-metrics-")
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(port, registry=registry)
+    logger.info(f"Métriques Prometheus exposées sur le port {port} ({os.environ['PROMETHEUS_MULTIPROC_DIR']})")
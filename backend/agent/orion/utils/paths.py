@@ -73,3 +73,18 @@ def get_token_path() -> Path:
     return Path(os.getenv("GOOGLE_TOKEN_PATH", get_secrets_dir() / "token.json"))
 
 
+def get_discovery_dir() -> Path:
+    """Retourne le répertoire des documents de découverte Google mis en cache localement."""
+    env_discovery_dir = os.getenv("ORION_DISCOVERY_DIR")
+    if env_discovery_dir:
+        return Path(env_discovery_dir).resolve()
+    return get_secrets_dir().parent / "discovery"
+
+
+def get_service_account_path() -> Path | None:
+    """Retourne la clé de compte de service (GOOGLE_SERVICE_ACCOUNT_PATH ou secrets/service_account.json), si présente."""
+    env_path = os.getenv("GOOGLE_SERVICE_ACCOUNT_PATH")
+    if env_path:
+        return Path(env_path)
+    default_path = get_secrets_dir() / "service_account.json"
+    return default_path if default_path.exists() else None
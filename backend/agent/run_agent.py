@@ -1,9 +1,12 @@
-from orion.app.agent import entrypoint
+from orion.app.agent import entrypoint, prewarm
 from livekit.agents import cli, WorkerOptions
+from orion.utils.metrics import start_metrics_server
 
 if __name__ == "__main__":
+    start_metrics_server()
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
         )
     )
@@ -1 +1 @@
-"""Orion API - Flask server for LiveKit tokens"""
+"""Orion API - async server for LiveKit tokens and agent dispatch"""
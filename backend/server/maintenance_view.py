@@ -0,0 +1,267 @@
+"""Vue matérialisée des interventions de maintenance pour l'app mobile.
+
+Le serveur s'abonne aux notifications push de Google Calendar sur le
+calendrier maintenance. Chaque notification déclenche une synchronisation
+incrémentale (syncToken) du cache local d'événements ; l'app mobile lit
+ensuite cette vue sans qu'aucun appel à Google ne soit fait par requête.
+"""
+import os
+import sys
+import uuid
+import logging
+import secrets
+import datetime
+import itertools
+import threading
+from pathlib import Path
+
+# Réutiliser les services Google de l'agent Orion (backend/agent)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "agent"))
+
+from orion.utils.dates import paris_tz
+from orion.utils.interventions import normalize_urgence
+from orion.services.google.auth import service
+from orion.services.google.executor import execute_blocking
+from orion.services.google.fields import CALENDAR_WATCH_FIELDS
+from orion.services.google.calendar_store import CalendarStore, event_bounds
+
+logger = logging.getLogger(__name__)
+
+# Renouveler l'abonnement une heure avant son expiration
+WATCH_RENEWAL_MARGIN = datetime.timedelta(hours=1)
+
+# Nouvel essai d'un renouvellement en échec : backoff exponentiel (en secondes)
+WATCH_RETRY_BASE = 60
+WATCH_RETRY_MAX = 30 * 60
+
+# Sans URL publique pour les notifications, synchronisation incrémentale périodique (en secondes),
+# surchargeable par CALENDAR_POLL_INTERVAL (lu au démarrage de la synchronisation)
+POLL_INTERVAL = 60.0
+
+
+def poll_interval() -> float:
+    return float(os.getenv("CALENDAR_POLL_INTERVAL") or POLL_INTERVAL)
+
+
+class MaintenanceView:
+    """Interventions à venir du calendrier maintenance, tenues à jour par notifications push."""
+
+    def __init__(self, calendar_id, store=None, channel_token=None):
+        self.calendar_id = calendar_id
+        self.store = store or CalendarStore()
+        self.channel_token = channel_token or secrets.token_urlsafe(24)
+        self.channel_id = None
+        self.resource_id = None
+        # Canaux encore ouverts chez Google (identifiant -> resourceId) : pendant un
+        # renouvellement, l'ancien canal reste actif jusqu'à son arrêt
+        self._channels = {}
+
+        self._sync_lock = threading.Lock()
+        self._pending = threading.Event()
+        self._closed = threading.Event()
+        self._renewal_timer = None
+        self._poll_thread = None
+
+    # Synchronisation
+
+    def _sync_loop(self):
+        # Regroupe les notifications reçues pendant une synchronisation en une seule passe supplémentaire
+        while self._pending.is_set():
+            self._pending.clear()
+            try:
+                self.store.sync(self.calendar_id, force=True)
+            except Exception as e:
+                logger.error(f"Erreur lors de la synchronisation du calendrier maintenance : {e}")
+
+    def request_sync(self):
+        """Planifie une synchronisation incrémentale en arrière-plan."""
+        self._pending.set()
+        if not self._sync_lock.acquire(blocking=False):
+            return  # Une synchronisation est en cours, elle prendra en compte cette demande
+
+        def run():
+            while True:
+                try:
+                    self._sync_loop()
+                finally:
+                    self._sync_lock.release()
+                # Une notification a pu arriver entre la fin de la boucle et la libération du verrou
+                if not self._pending.is_set() or not self._sync_lock.acquire(blocking=False):
+                    return
+
+        threading.Thread(target=run, name="maintenance-view-sync", daemon=True).start()
+
+    def handle_notification(self, headers):
+        """
+        Traite une notification push Google Calendar.
+
+        Returns:
+            bool: False si la notification ne concerne pas ce canal (jeton ou canal inconnu)
+        """
+        if headers.get("X-Goog-Channel-Token") != self.channel_token:
+            return False
+        if self._channels and headers.get("X-Goog-Channel-ID") not in self._channels:
+            return False
+
+        state = headers.get("X-Goog-Resource-State")
+        if state == "sync":
+            # Message d'initialisation envoyé à la création du canal
+            logger.info(f"Canal de notification {headers.get('X-Goog-Channel-ID')} actif")
+            return True
+
+        logger.info(f"Notification calendrier maintenance reçue ({state})")
+        self.request_sync()
+        return True
+
+    # Abonnement aux notifications
+
+    def watch(self, address):
+        """Abonne le serveur aux modifications du calendrier maintenance et planifie le renouvellement."""
+        channel_id = str(uuid.uuid4())
+        response = execute_blocking(service["calendar"].events().watch(
+            calendarId=self.calendar_id,
+            body={
+                "id": channel_id,
+                "type": "web_hook",
+                "address": address,
+                "token": self.channel_token,
+            },
+            fields=CALENDAR_WATCH_FIELDS,
+        ), "calendar")
+
+        self.channel_id = channel_id
+        self.resource_id = response.get("resourceId")
+        self._channels[channel_id] = self.resource_id
+        logger.info(f"Abonnement aux notifications du calendrier maintenance : canal {channel_id}")
+
+        expiration = response.get("expiration")
+        if expiration:
+            expires_at = datetime.datetime.fromtimestamp(int(expiration) / 1000, tz=datetime.timezone.utc)
+            delay = expires_at - datetime.datetime.now(datetime.timezone.utc) - WATCH_RENEWAL_MARGIN
+            self._schedule_renewal(max(delay.total_seconds(), 60), address)
+
+    def _schedule_renewal(self, delay, address, attempt=0):
+        if self._closed.is_set():
+            return
+        self._renewal_timer = threading.Timer(delay, self._renew, args=(address, attempt))
+        self._renewal_timer.daemon = True
+        self._renewal_timer.start()
+
+    def poll(self, interval=None):
+        """
+        Repli sans notifications push : synchronisation incrémentale périodique en arrière-plan.
+        Sans effet si elle tourne déjà ; elle reste active jusqu'à la fermeture de la vue.
+        """
+        if self._poll_thread is not None and self._poll_thread.is_alive():
+            return
+        interval = interval or poll_interval()
+
+        def run():
+            while not self._closed.is_set():
+                self.request_sync()
+                self._closed.wait(interval)
+
+        self._poll_thread = threading.Thread(target=run, name="maintenance-view-poll", daemon=True)
+        self._poll_thread.start()
+
+    def _renew(self, address, attempt=0):
+        if self._closed.is_set():
+            return
+        previous = (self.channel_id, self.resource_id)
+        try:
+            self.watch(address)
+        except Exception as e:
+            delay = min(WATCH_RETRY_MAX, WATCH_RETRY_BASE * 2 ** attempt)
+            logger.error(f"Impossible de renouveler l'abonnement aux notifications, nouvel essai dans {delay:.0f}s : {e}")
+            # L'ancien canal expire sans remplaçant : la synchronisation périodique prend le relais
+            self.poll()
+            self._schedule_renewal(delay, address, attempt + 1)
+        else:
+            # Le nouveau canal reçoit les notifications : l'ancien peut être arrêté
+            self.stop_channel(*previous)
+        # Rattraper les modifications éventuellement manquées pendant le renouvellement
+        self.request_sync()
+
+    def stop_channel(self, channel_id, resource_id):
+        """Arrête un canal de notification chez Google ; ses notifications sont ensuite refusées."""
+        try:
+            execute_blocking(service["calendar"].channels().stop(
+                body={"id": channel_id, "resourceId": resource_id}
+            ), "calendar")
+            logger.info(f"Canal de notification {channel_id} arrêté")
+        except Exception as e:
+            logger.warning(f"Impossible d'arrêter le canal de notification {channel_id} : {e}")
+        finally:
+            self._channels.pop(channel_id, None)
+
+    def close(self):
+        """Arrête le renouvellement, la synchronisation périodique et les canaux ouverts (arrêt du serveur)."""
+        self._closed.set()
+        timer = self._renewal_timer
+        if timer is not None:
+            timer.cancel()
+            # Un renouvellement en cours se termine sans replanifier, son canal est arrêté ci-dessous
+            if timer is not threading.current_thread():
+                timer.join()
+        if self._poll_thread is not None:
+            self._poll_thread.join()
+        for channel_id, resource_id in list(self._channels.items()):
+            self.stop_channel(channel_id, resource_id)
+
+    # Lecture
+
+    def interventions(self, days=7, ligne=None, urgence=None, limit=None):
+        """
+        Parcourt les interventions des `days` prochains jours par ordre de début,
+        filtrées par ligne ou urgence et limitées aux `limit` premières.
+        """
+        filters = {}
+        if ligne:
+            filters["ligne"] = ligne
+        if urgence:
+            # Mêmes niveaux que ceux écrits par l'agent (ex: 'haute' -> 'urgent')
+            filters["urgence"] = normalize_urgence(urgence)
+
+        now_paris = datetime.datetime.now(paris_tz)
+        events = self.store.iter_events(
+            self.calendar_id, now_paris, now_paris + datetime.timedelta(days=days), private_properties=filters
+        )
+
+        for event in itertools.islice(events, limit):
+            start, end = event_bounds(event)
+            properties = event.get("extendedProperties", {}).get("private", {})
+            yield {
+                "id": event.get("id"),
+                "titre": event.get("summary", "Sans titre"),
+                "ligne": properties.get("ligne"),
+                "machine": properties.get("machine"),
+                "probleme": properties.get("probleme"),
+                "urgence": properties.get("urgence"),
+                "description": event.get("description", ""),
+                "debut": start.isoformat(),
+                "fin": end.isoformat(),
+                "lien": event.get("htmlLink"),
+            }
+
+
+def create_maintenance_view():
+    """Crée la vue à partir de l'environnement ; None si le calendrier maintenance n'est pas configuré."""
+    calendar_id = os.getenv("MAINTENANCE_CALENDAR_ID")
+    if not calendar_id:
+        logger.warning("MAINTENANCE_CALENDAR_ID non configuré : vue maintenance désactivée")
+        return None
+
+    view = MaintenanceView(calendar_id, channel_token=os.getenv("CALENDAR_WEBHOOK_TOKEN"))
+
+    # Chargement initial en arrière-plan, puis abonnement si une URL publique est configurée
+    webhook_url = os.getenv("CALENDAR_WEBHOOK_URL")
+    if webhook_url:
+        view.request_sync()
+        try:
+            view.watch(webhook_url)
+            return view
+        except Exception as e:
+            logger.error(f"Impossible de s'abonner aux notifications du calendrier maintenance : {e}")
+
+    view.poll()
+    return view
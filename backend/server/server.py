@@ -1,15 +1,79 @@
 import os
-import base64
-import requests
-from flask import Flask, jsonify
+import re
+import sys
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+import aiohttp
 from dotenv import load_dotenv
-from flask_cors import CORS
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
 
 load_dotenv()
 
-from livekit.api import AccessToken, VideoGrants
+from livekit import api
+
+# Modules du serveur importables en mode script (python server/server.py) comme via uvicorn
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from maintenance_view import create_maintenance_view
+from token_service import TokenService
+
+logger = logging.getLogger(__name__)
+
+AGENT_NAME = "orion-assistant"
+
+# Room et identité historiques, utilisées quand le terminal ne s'identifie pas
+DEFAULT_ROOM = "my-room"
+DEFAULT_IDENTITY = "identity"
+DEFAULT_TERMINAL = "mobile-app"
+
+# Identifiants de terminal et de room acceptés (ex: atelier-3, ligne1_poste2)
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Délai des appels à l'API LiveKit (secondes)
+LIVEKIT_TIMEOUT = 10
 
-app = Flask(__name__)
+# Nombre maximal de terminaux par demande de jetons groupée
+MAX_BULK_TERMINALS = 200
+
+# Bornes de /maintenanceSchedule : horizon (jours) et nombre d'interventions retournées
+MAX_SCHEDULE_DAYS = 365
+MAX_SCHEDULE_LIMIT = 500
+
+
+def get_env_var(name):
+    value = os.getenv(name)
+    if not value:
+        raise ValueError(f"Missing environment variable: {name}")
+    return value
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Client LiveKit partagé : une session HTTP keep-alive pour tous les dispatchs
+    app.state.livekit = api.LiveKitAPI(
+        url=get_env_var("LIVEKIT_URL"),
+        api_key=get_env_var("LIVEKIT_API_KEY"),
+        api_secret=get_env_var("LIVEKIT_API_SECRET"),
+        timeout=aiohttp.ClientTimeout(total=LIVEKIT_TIMEOUT),
+    )
+    # Jetons signés en cache, réémis seulement à l'approche de leur expiration
+    app.state.tokens = TokenService(get_env_var("LIVEKIT_API_KEY"), get_env_var("LIVEKIT_API_SECRET"))
+    # Vue des interventions de maintenance, tenue à jour par les notifications Google Calendar
+    # (identifiants et abonnement chargés hors de la boucle d'événements)
+    app.state.maintenance_view = await asyncio.to_thread(create_maintenance_view)
+    try:
+        yield
+    finally:
+        if app.state.maintenance_view is not None:
+            await asyncio.to_thread(app.state.maintenance_view.close)
+        await app.state.livekit.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Configuration CORS sécurisée
 # En développement : autorise localhost avec n'importe quel port
@@ -18,93 +82,131 @@ allowed_origins = os.getenv("ALLOWED_ORIGINS", "")
 if allowed_origins:
     # Production : utiliser les origines spécifiées dans .env
     origins_list = [origin.strip() for origin in allowed_origins.split(",") if origin.strip()]
+    app.add_middleware(CORSMiddleware, allow_origins=origins_list, allow_methods=["*"], allow_headers=["*"])
 else:
     # Développement : autoriser localhost avec tous les ports
-    origins_list = [
-        "http://localhost:*",
-        "http://127.0.0.1:*",
-        "http://localhost",
-        "http://127.0.0.1"
-    ]
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origin_regex=r"http://(localhost|127\.0\.0\.1)(:\d+)?",
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
-CORS(app, resources={r"/*": {"origins": origins_list}})
 
-def get_env_var(name):
-    value = os.getenv(name)
-    if not value:
-        raise ValueError(f"Missing environment variable: {name}")
-    return value
+def resolve_session(terminal=None, room=None):
+    """
+    Détermine la room et l'identité d'un terminal.
+    Chaque terminal a sa propre identité et, sauf room explicite, sa propre room (orion-<terminal>).
+    Sans paramètre, conserve la room et l'identité historiques.
 
-@app.route("/getToken")
-def get_token():
-    api_key = get_env_var("LIVEKIT_API_KEY")
-    api_secret = get_env_var("LIVEKIT_API_SECRET")
-
-    token = (
-        AccessToken(api_key, api_secret)
-        .with_identity("identity")
-        .with_name("mobile-app")
-        .with_grants(VideoGrants(room_join=True, room="my-room"))
-        .to_jwt()
-    )
+    Returns:
+        tuple: (room, identity, name)
+    """
+    for value in (terminal, room):
+        if value is not None and not NAME_PATTERN.match(value):
+            raise HTTPException(status_code=400, detail=f"Invalid terminal or room name: {value!r}")
+
+    if terminal is None:
+        return room or DEFAULT_ROOM, DEFAULT_IDENTITY, DEFAULT_TERMINAL
+    return room or f"orion-{terminal}", f"terminal-{terminal}", terminal
+
+
+@app.exception_handler(HTTPException)
+async def http_error(request, exc):
+    return JSONResponse({"success": False, "error": exc.detail}, status_code=exc.status_code)
+
+
+class BulkTokenRequest(BaseModel):
+    terminals: list[str]
+
+
+@app.get("/getToken")
+async def get_token(request: Request, terminal: str | None = None, room: str | None = None):
+    room, identity, name = resolve_session(terminal, room)
+    token, expires_at = request.app.state.tokens.get(identity, name, room)
+    return {"token": token, "room": room, "identity": identity, "expires_at": expires_at}
+
+
+@app.post("/getTokens")
+async def get_tokens(request: Request, body: BulkTokenRequest):
+    """Émet les jetons de plusieurs terminaux en une requête (reconnexion de tout l'atelier)"""
+    if len(body.terminals) > MAX_BULK_TERMINALS:
+        raise HTTPException(status_code=400, detail=f"Too many terminals (max {MAX_BULK_TERMINALS})")
 
-    return jsonify({"token": token})
+    sessions = [resolve_session(terminal) for terminal in body.terminals]
+    tokens = request.app.state.tokens.get_many((identity, name, room) for room, identity, name in sessions)
+    return {
+        "success": True,
+        "tokens": [
+            {"terminal": terminal, "token": token, "room": room, "identity": identity, "expires_at": expires_at}
+            for terminal, (room, identity, _), (token, expires_at) in zip(body.terminals, sessions, tokens)
+        ]
+    }
 
-@app.route("/dispatchAgent")
-def dispatch_agent():
-    """Crée un job pour dispatcher l'agent Orion à la room"""
+
+@app.get("/dispatchAgent")
+async def dispatch_agent(request: Request, terminal: str | None = None, room: str | None = None):
+    """Crée un job pour dispatcher l'agent Orion à la room du terminal"""
+    room, _, _ = resolve_session(terminal, room)
     try:
-        api_key = get_env_var("LIVEKIT_API_KEY")
-        api_secret = get_env_var("LIVEKIT_API_SECRET")
-        livekit_url = get_env_var("LIVEKIT_URL")
-        
-        # Utiliser l'API REST LiveKit directement (plus simple pour Flask synchrone)
-        # Convertir wss:// en https:// pour l'API REST
-        api_base_url = livekit_url.replace("wss://", "https://").replace("ws://", "http://")
-        
-        # Endpoint pour dispatcher un agent
-        dispatch_url = f"{api_base_url}/twirp/livekit.AgentDispatchService/DispatchAgent"
-        
-        # Authentification Basic (API Key:Secret encodé en base64)
-        auth_string = f"{api_key}:{api_secret}"
-        auth_bytes = auth_string.encode('ascii')
-        auth_b64 = base64.b64encode(auth_bytes).decode('ascii')
-        
-        headers = {
-            "Authorization": f"Basic {auth_b64}",
-            "Content-Type": "application/json"
-        }
-        
-        # Payload pour dispatcher l'agent
-        payload = {
-            "agent_name": "orion-assistant",
-            "room": "my-room"
-        }
-        
-        # Faire la requête POST
-        response = requests.post(dispatch_url, json=payload, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            return jsonify({
-                "success": True,
-                "message": "Agent dispatched successfully to room my-room"
-            })
-        else:
-            return jsonify({
-                "success": False,
-                "error": f"LiveKit API error: {response.status_code} - {response.text}"
-            }), response.status_code
-            
+        dispatch = await request.app.state.livekit.agent_dispatch.create_dispatch(
+            api.CreateAgentDispatchRequest(agent_name=AGENT_NAME, room=room)
+        )
+    except api.TwirpError as e:
+        logger.error(f"Erreur LiveKit lors du dispatch vers {room} : {e}")
+        return JSONResponse({
+            "success": False,
+            "error": f"LiveKit API error: {e.status} - {e.message}"
+        }, status_code=e.status if 400 <= e.status < 600 else 502)
     except Exception as e:
-        return jsonify({
+        logger.error(f"Erreur lors du dispatch vers {room} : {e}")
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+    return {
+        "success": True,
+        "message": f"Agent dispatched successfully to room {room}",
+        "room": room,
+        "dispatch_id": dispatch.id,
+    }
+
+
+@app.post("/calendarWebhook")
+async def calendar_webhook(request: Request):
+    """Reçoit les notifications push Google Calendar du calendrier maintenance"""
+    maintenance_view = request.app.state.maintenance_view
+    if maintenance_view is None:
+        return Response(status_code=404)
+
+    # Répondre immédiatement : la synchronisation se fait en arrière-plan
+    if not maintenance_view.handle_notification(request.headers):
+        return Response(status_code=403)
+    return Response(status_code=200)
+
+
+@app.get("/maintenanceSchedule")
+async def maintenance_schedule(request: Request, days: int = Query(7, ge=1, le=MAX_SCHEDULE_DAYS),
+                               ligne: str | None = None, urgence: str | None = None,
+                               limit: int | None = Query(None, ge=1, le=MAX_SCHEDULE_LIMIT)):
+    """Retourne les prochaines interventions de maintenance depuis la vue locale (sans appel à Google)"""
+    maintenance_view = request.app.state.maintenance_view
+    if maintenance_view is None:
+        return JSONResponse({
             "success": False,
-            "error": str(e)
-        }), 500
+            "error": "Maintenance calendar not configured"
+        }, status_code=503)
+
+    return {
+        "success": True,
+        "interventions": list(maintenance_view.interventions(days, ligne=ligne, urgence=urgence, limit=limit))
+    }
+
 
 if __name__ == "__main__":
-    print("Flask server started (local mode)")
-    app.run(
+    import uvicorn
+
+    print("Server started (local mode)")
+    uvicorn.run(
+        app,
         host="0.0.0.0",
         port=int(os.environ.get("PORT", 5000)),  # Render injecte PORT automatiquement
-        debug=False
-    )
\ No newline at end of file
+    )
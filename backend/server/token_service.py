@@ -0,0 +1,83 @@
+"""
+Émission des jetons d'accès LiveKit des terminaux.
+Les jetons signés sont mis en cache par identité et room, et réémis seulement à l'approche
+de leur expiration : un terminal qui se reconnecte en boucle ne déclenche pas de nouvelle signature.
+"""
+
+import time
+import logging
+from datetime import timedelta
+
+from livekit.api import AccessToken, VideoGrants
+
+logger = logging.getLogger(__name__)
+
+# Durée de validité d'un jeton émis
+TOKEN_TTL = timedelta(hours=6)
+
+# Un jeton en cache est réémis quand il lui reste moins que cette marge
+REFRESH_MARGIN = timedelta(minutes=15)
+
+# Au-delà de ce nombre d'entrées, les jetons expirés sont purgés du cache
+MAX_CACHED_TOKENS = 1000
+
+
+class TokenService:
+    """Cache des jetons LiveKit signés, par (identité, nom, room)."""
+
+    def __init__(self, api_key, api_secret, ttl=TOKEN_TTL, refresh_margin=REFRESH_MARGIN):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        # (identité, nom, room) -> (jeton, expiration en secondes epoch)
+        self._tokens = {}
+        self.minted = 0
+
+    def get(self, identity, name, room):
+        """
+        Retourne un jeton valide pour la session, depuis le cache s'il n'approche pas de son expiration.
+
+        Returns:
+            tuple: (jeton JWT, expiration en secondes epoch)
+        """
+        key = (identity, name, room)
+        cached = self._tokens.get(key)
+        now = time.time()
+        if cached and cached[1] - now > self.refresh_margin.total_seconds():
+            return cached
+
+        token = (
+            AccessToken(self.api_key, self.api_secret)
+            .with_identity(identity)
+            .with_name(name)
+            .with_ttl(self.ttl)
+            .with_grants(VideoGrants(room_join=True, room=room))
+            .to_jwt()
+        )
+        entry = (token, int(now + self.ttl.total_seconds()))
+        self.minted += 1
+
+        if len(self._tokens) >= MAX_CACHED_TOKENS:
+            self._prune(now)
+        self._tokens[key] = entry
+        return entry
+
+    def get_many(self, sessions):
+        """
+        Émet en une fois les jetons de plusieurs terminaux (reconnexion de tout un atelier).
+
+        Args:
+            sessions: Itérable de (identité, nom, room)
+
+        Returns:
+            list: (jeton JWT, expiration) dans l'ordre des sessions
+        """
+        return [self.get(identity, name, room) for identity, name, room in sessions]
+
+    def _prune(self, now):
+        """Retire les jetons expirés du cache."""
+        expired = [key for key, (_, expires_at) in self._tokens.items() if expires_at <= now]
+        for key in expired:
+            del self._tokens[key]
+        logger.info(f"Cache des jetons : {len(expired)} jeton(s) expiré(s) retiré(s), {len(self._tokens)} restant(s)")
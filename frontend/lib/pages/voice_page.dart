@@ -27,6 +27,7 @@ class _VoicePageState extends State<VoicePage> with TickerProviderStateMixin {
 
   Timer? _audioLevelTimer;
   Timer? _audioSubscriptionTimer;
+  EventsListener<RoomEvent>? _linkListener;
   double _volume = 0.0;
 
   late AnimationController _waveAnimationController;
@@ -87,6 +88,9 @@ class _VoicePageState extends State<VoicePage> with TickerProviderStateMixin {
       // S'abonner automatiquement aux tracks audio des participants distants (l'agent)
       _setupAudioSubscription(room);
 
+      // Afficher les liens publiés par l'agent sur le canal de données
+      _linkListener = LiveKitService.listenToLinks(room, _showLink);
+
       if (!mounted) return;
 
       setState(() {
@@ -142,6 +146,19 @@ class _VoicePageState extends State<VoicePage> with TickerProviderStateMixin {
     }
   }
 
+  /// Affiche une fiche de résultat reçue de l'agent
+  void _showLink(Map<String, dynamic> card) {
+    if (!mounted) return;
+    final title = card['title'] ?? '';
+    final url = card['url'];
+    ScaffoldMessenger.of(context).showSnackBar(
+      SnackBar(
+        duration: const Duration(seconds: 8),
+        content: SelectableText(url != null ? "$title\n$url" : "$title"),
+      ),
+    );
+  }
+
   void toggleMute() async {
     if (_room?.localParticipant == null) return;
 
@@ -207,6 +224,7 @@ class _VoicePageState extends State<VoicePage> with TickerProviderStateMixin {
   void dispose() {
     _audioLevelTimer?.cancel();
     _audioSubscriptionTimer?.cancel();
+    _linkListener?.dispose();
     _waveAnimationController.dispose();
     _focusNode.dispose();
     _room?.disconnect();
@@ -7,6 +7,9 @@ import '../config/app_config.dart';
 
 /// Service pour gérer la connexion et les interactions avec LiveKit
 class LiveKitService {
+  /// Sujet du canal de données sur lequel l'agent publie ses liens
+  static const String linkTopic = 'orion.links';
+
   /// Récupère un token LiveKit depuis le serveur
   static Future<String> fetchToken() async {
     final response = await http.get(Uri.parse(AppConfig.serverUrl));
@@ -45,6 +48,26 @@ class LiveKitService {
     return room;
   }
 
+  /// Écoute les liens et fiches de résultat publiés par l'agent (événement créé, brouillon, contact...)
+  static EventsListener<RoomEvent> listenToLinks(
+    Room room,
+    void Function(Map<String, dynamic>) onLink,
+  ) {
+    final listener = room.createListener();
+    listener.on<DataReceivedEvent>((event) {
+      if (event.topic != linkTopic) return;
+      try {
+        final card = jsonDecode(utf8.decode(event.data));
+        if (card is Map<String, dynamic>) {
+          onLink(card);
+        }
+      } catch (e) {
+        debugPrint("Lien invalide reçu de l'agent: $e");
+      }
+    });
+    return listener;
+  }
+
   /// Configure le périphérique audio de sortie
   static Future<void> configureAudioOutputDevice(Room room) async {
     try {
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Banc d'essai hors ligne des outils d'Orion
+Exécute les vraies classes de fonctions contre la fausse API Google locale (scripts/fake_google_api.py)
+et mesure, pour chaque outil, la latence (médiane, p95, max) et le nombre d'appels à l'API par méthode.
+
+Exemple :
+    python scripts/benchmark_tools.py --latency 80 --events 2000 --contacts 5000 --iterations 20
+"""
+
+import os
+import time
+import asyncio
+import argparse
+import statistics
+from collections import Counter
+
+from fake_google_api import FakeGoogleAPI, FakeGoogleState
+
+# Calendriers de la fausse API, lus par les outils via l'environnement
+CALENDARS = {
+    "MAINTENANCE_CALENDAR_ID": "maintenance",
+    "PRODUCTION_LIGNE_1_CALENDAR_ID": "ligne1",
+    "PRODUCTION_LIGNE_2_CALENDAR_ID": "ligne2",
+}
+os.environ.update(CALENDARS)
+os.environ.setdefault("EMAIL_MAINTENANCE", "maintenance@example.com")
+
+
+def scenarios(iteration, state):
+    """Appels d'outils mesurés à chaque itération (nom affiché, méthode, arguments)."""
+    contact = f"contact{iteration}@example.com"
+    person = list(state.contacts.values())[iteration % len(state.contacts)]["names"][0]
+    subject = f"Rapport {iteration}"
+    today = time.strftime("%Y-%m-%d")
+    return [
+        ("schedule_maintenance", "schedule_maintenance", dict(
+            ligne_production=str(iteration % 2 + 1), machine_name="Presse hydraulique",
+            probleme_description="Fuite d'huile", urgence=["urgent", "moyen", "faible"][iteration % 3])),
+        ("get_maintenance_schedule", "get_maintenance_schedule", dict(nombre_jours=30)),
+        ("list_event", "list_event", dict(calendar_name="MAINTENANCE_CALENDAR_ID", date=today)),
+        ("research_contact (exact)", "research_contact", dict(first_name="Stéphane")),
+        ("research_contact (approx.)", "research_contact", dict(first_name="Stefan")),
+        ("create_draft", "create_draft", dict(recipient=contact, subject=subject, body="Bonjour")),
+        ("send_draft (handle)", "send_draft", dict(recipient=contact, subject=subject)),
+        ("send_draft (recherche)", "send_draft", dict(recipient=f"contact{iteration + 1}@example.com",
+                                                     subject=f"Brouillon {iteration + 1}")),
+        ("modify_contact", "modify_contact", dict(
+            first_name=person["givenName"], last_name=person["familyName"], notes="chef équipe")),
+    ]
+
+
+def percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+async def run(args):
+    state = FakeGoogleState(
+        calendars=CALENDARS.values(),
+        events_per_calendar=args.events,
+        drafts=args.drafts,
+        contacts=args.contacts,
+    )
+    api = FakeGoogleAPI(state, latency=args.latency / 1000).start().install()
+
+    # Import après installation de la fausse API : les services d'Orion la ciblent
+    from orion.app.functions import AssistantFnc
+    from orion.services.google.calendar_store import calendar_store
+    from orion.services.google.contacts_directory import contact_directory
+
+    fnc = AssistantFnc()
+    durations = {}
+    calls = {}
+
+    # Chargement initial des caches (équivalent du préchauffage du worker), mesuré à part
+    started = time.perf_counter()
+    contact_directory.sync(force=True)
+    for calendar_id in CALENDARS.values():
+        calendar_store.sync(calendar_id, force=True)
+    warmup = time.perf_counter() - started
+    warmup_calls = Counter(state.calls)
+    state.calls.clear()
+
+    for iteration in range(args.iterations):
+        for label, method, kwargs in scenarios(iteration, state):
+            before = Counter(state.calls)
+            started = time.perf_counter()
+            result = await getattr(fnc, method)(**kwargs)
+            durations.setdefault(label, []).append(time.perf_counter() - started)
+            calls.setdefault(label, Counter()).update(Counter(state.calls) - before)
+            if args.verbose:
+                print(f"[{label}] {str(result)[:120]!r}")
+
+    api.stop()
+
+    print(f"\nFausse API : latence {args.latency:.0f} ms, {args.events} événements/calendrier, "
+          f"{args.drafts} brouillons, {args.contacts} contacts, {args.iterations} itérations")
+    print(f"Préchargement des caches : {warmup * 1000:.0f} ms, appels {dict(warmup_calls)}\n")
+    print(f"{'outil':<28} {'médiane':>9} {'p95':>9} {'max':>9}  appels API par exécution")
+    for label, values in durations.items():
+        per_call = ", ".join(f"{name}={count / len(values):.1f}" for name, count in sorted(calls[label].items()))
+        print(
+            f"{label:<28} {statistics.median(values) * 1000:>7.1f}ms {percentile(values, 0.95) * 1000:>7.1f}ms "
+            f"{max(values) * 1000:>7.1f}ms  {per_call or '-'}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai des outils d'Orion contre une fausse API Google")
+    parser.add_argument("--latency", type=float, default=50, help="Latence par aller-retour HTTP (ms)")
+    parser.add_argument("--events", type=int, default=500, help="Événements par calendrier")
+    parser.add_argument("--drafts", type=int, default=200, help="Brouillons dans la boîte mail")
+    parser.add_argument("--contacts", type=int, default=2000, help="Contacts du carnet d'adresses")
+    parser.add_argument("--iterations", type=int, default=10, help="Exécutions de chaque outil")
+    parser.add_argument("--verbose", action="store_true", help="Afficher la réponse de chaque outil")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -140,7 +140,7 @@ cd "$SCRIPT_DIR"
 if [ -f "$SCRIPT_DIR/dispatch_agent.py" ]; then
     # Utiliser le venv du projet pour exécuter le script
     if [ -f "$VENV_PYTHON" ]; then
-        "$VENV_PYTHON" "$SCRIPT_DIR/dispatch_agent.py" "my-room" "orion-assistant" 2>&1 | head -5
+        "$VENV_PYTHON" "$SCRIPT_DIR/dispatch_agent.py" "my-room" --agent "orion-assistant" 2>&1 | head -5
         DISPATCH_EXIT=$?
         if [ $DISPATCH_EXIT -eq 0 ]; then
             echo "Agent dispatché avec succès à la room!"
@@ -148,7 +148,7 @@ if [ -f "$SCRIPT_DIR/dispatch_agent.py" ]; then
             echo "Le dispatch a retourné un code d'erreur $DISPATCH_EXIT"
         fi
     else
-        python3 "$SCRIPT_DIR/dispatch_agent.py" "my-room" "orion-assistant" 2>&1 | head -5
+        python3 "$SCRIPT_DIR/dispatch_agent.py" "my-room" --agent "orion-assistant" 2>&1 | head -5
     fi
 else
     echo "Script dispatch_agent.py non trouvé, l'agent ne sera pas dispatché automatiquement"
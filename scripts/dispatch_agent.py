@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
 """
 Script pour dispatcher l'agent Orion à une room LiveKit
-Utilise l'API LiveKit directement, sans passer par le serveur Flask
+Utilise l'API LiveKit directement, sans passer par le serveur
+
+Usage :
+    python scripts/dispatch_agent.py [room] [--agent orion-assistant]
+    python scripts/dispatch_agent.py --rooms orion-atelier-1 orion-atelier-2 --concurrency 10
+    python scripts/dispatch_agent.py --file rooms.txt   # une room par ligne (# pour commenter)
 """
 
 import os
 import sys
+import time
 import asyncio
+import argparse
 from dotenv import load_dotenv
 from livekit import api
 
@@ -65,22 +72,25 @@ def get_env_var(name):
         raise ValueError(f"Variable d'environnement manquante: {name}")
     return value
 
+# Dispatchs simultanés par défaut en mode groupé
+DEFAULT_CONCURRENCY = 8
+
+def create_livekit_api():
+    """Crée un client LiveKit (une session HTTP réutilisée pour toutes ses requêtes)"""
+    return api.LiveKitAPI(
+        url=get_env_var("LIVEKIT_URL"),
+        api_key=get_env_var("LIVEKIT_API_KEY"),
+        api_secret=get_env_var("LIVEKIT_API_SECRET")
+    )
+
 async def dispatch_agent_async(room_name="my-room", agent_name="orion-assistant"):
     """Dispatche l'agent à la room spécifiée (version asynchrone)"""
     try:
-        api_key = get_env_var("LIVEKIT_API_KEY")
-        api_secret = get_env_var("LIVEKIT_API_SECRET")
-        livekit_url = get_env_var("LIVEKIT_URL")
-        
         print(f"🔄 Dispatch de l'agent '{agent_name}' vers la room '{room_name}'...")
-        print(f"   LiveKit URL: {livekit_url}")
+        print(f"   LiveKit URL: {get_env_var('LIVEKIT_URL')}")
         
         # Initialiser l'API LiveKit
-        lkapi = api.LiveKitAPI(
-            url=livekit_url,
-            api_key=api_key,
-            api_secret=api_secret
-        )
+        lkapi = create_livekit_api()
         
         # Créer la requête de dispatch
         dispatch_request = api.CreateAgentDispatchRequest(
@@ -92,7 +102,7 @@ async def dispatch_agent_async(room_name="my-room", agent_name="orion-assistant"
         dispatch = await lkapi.agent_dispatch.create_dispatch(dispatch_request)
         
         print(f"✅ Agent dispatché avec succès!")
-        print(f"   Dispatch ID: {dispatch.job_id if hasattr(dispatch, 'job_id') else 'N/A'}")
+        print(f"   Dispatch ID: {dispatch.id if hasattr(dispatch, 'id') else 'N/A'}")
         
         # Fermer l'API
         await lkapi.aclose()
@@ -105,13 +115,75 @@ async def dispatch_agent_async(room_name="my-room", agent_name="orion-assistant"
         traceback.print_exc()
         return False
 
+async def dispatch_agents_async(rooms, agent_name="orion-assistant", concurrency=DEFAULT_CONCURRENCY):
+    """
+    Dispatche l'agent à plusieurs rooms en parallèle, via un seul client LiveKit partagé.
+
+    Args:
+        rooms: Noms des rooms
+        agent_name: Nom de l'agent à dispatcher
+        concurrency: Nombre maximal de dispatchs simultanés
+
+    Returns:
+        list: (room, succès, dispatch ID ou message d'erreur, durée en secondes) dans l'ordre des rooms
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    lkapi = create_livekit_api()
+
+    async def dispatch_one(room_name):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                dispatch = await lkapi.agent_dispatch.create_dispatch(
+                    api.CreateAgentDispatchRequest(agent_name=agent_name, room=room_name)
+                )
+                return room_name, True, dispatch.id, time.perf_counter() - started
+            except Exception as e:
+                return room_name, False, str(e), time.perf_counter() - started
+
+    try:
+        return await asyncio.gather(*(dispatch_one(room_name) for room_name in rooms))
+    finally:
+        await lkapi.aclose()
+
 def dispatch_agent(room_name="my-room", agent_name="orion-assistant"):
     """Wrapper synchrone pour dispatcher l'agent"""
     return asyncio.run(dispatch_agent_async(room_name, agent_name))
 
+def dispatch_agents(rooms, agent_name="orion-assistant", concurrency=DEFAULT_CONCURRENCY):
+    """Dispatche l'agent à plusieurs rooms et affiche le rapport par room"""
+    print(f"🔄 Dispatch de l'agent '{agent_name}' vers {len(rooms)} room(s) ({concurrency} en parallèle)...")
+    started = time.perf_counter()
+    results = asyncio.run(dispatch_agents_async(rooms, agent_name, concurrency))
+    elapsed = time.perf_counter() - started
+
+    for room_name, success, detail, duration in results:
+        status = "✅" if success else "❌"
+        label = f"Dispatch ID: {detail}" if success else f"Erreur: {detail}"
+        print(f"   {status} {room_name:<30} {duration * 1000:>6.0f} ms  {label}")
+
+    failed = sum(1 for _, success, _, _ in results if not success)
+    print(f"{len(results) - failed}/{len(results)} room(s) dispatchée(s) en {elapsed:.1f}s")
+    return failed == 0
+
+def read_rooms(path):
+    """Lit une liste de rooms (une par ligne, lignes vides et commentaires # ignorés)"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
 if __name__ == "__main__":
-    room = sys.argv[1] if len(sys.argv) > 1 else "my-room"
-    agent = sys.argv[2] if len(sys.argv) > 2 else "orion-assistant"
-    
-    success = dispatch_agent(room, agent)
+    parser = argparse.ArgumentParser(description="Dispatche l'agent Orion à une ou plusieurs rooms LiveKit")
+    parser.add_argument("room", nargs="?", default="my-room", help="Room cible (mode simple)")
+    parser.add_argument("--rooms", nargs="+", default=[], help="Rooms cibles (mode groupé)")
+    parser.add_argument("--file", help="Fichier listant les rooms cibles, une par ligne (mode groupé)")
+    parser.add_argument("--agent", default="orion-assistant", help="Nom de l'agent à dispatcher")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Dispatchs simultanés")
+    args = parser.parse_args()
+
+    rooms = args.rooms + (read_rooms(args.file) if args.file else [])
+    if rooms:
+        # Rooms dédupliquées, dans l'ordre donné
+        success = dispatch_agents(list(dict.fromkeys(rooms)), args.agent, max(1, args.concurrency))
+    else:
+        success = dispatch_agent(args.room, args.agent)
     sys.exit(0 if success else 1)
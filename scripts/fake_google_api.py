@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Fausse API Google locale (Calendar, Gmail, People) pour les bancs d'essai hors ligne
+Sert les routes utilisées par Orion, requêtes batch comprises, avec une latence configurable
+et des volumes générés (événements, brouillons, contacts). Chaque appel est compté par méthode.
+"""
+
+import re
+import sys
+import json
+import time
+import uuid
+import base64
+import random
+import datetime
+import threading
+from pathlib import Path
+from collections import Counter
+from email import message_from_bytes
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+# Services de l'agent Orion (backend/agent)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend" / "agent"))
+
+PARIS = datetime.timezone(datetime.timedelta(hours=1))
+
+MACHINES = ["Presse hydraulique", "Convoyeur", "Robot de soudure", "Four", "Compresseur", "Tour CN"]
+PROBLEMES = ["Fuite d'huile", "Bruit anormal", "Surchauffe", "Arrêt intempestif", "Capteur défaillant"]
+URGENCES = ["urgent", "moyen", "faible"]
+PRENOMS = ["Stéphane", "Philippe", "Christophe", "Guillaume", "François", "Marie", "Julie", "Nathalie",
+           "Thomas", "Nicolas", "Camille", "Léa", "Hugo", "Chloé", "Antoine", "Sophie"]
+NOMS = ["Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy",
+        "Moreau", "Simon", "Laurent", "Lefebvre", "Michel", "Garcia", "Fournier"]
+
+
+def _iso(value):
+    return value.isoformat(timespec="seconds")
+
+
+class FakeGoogleState:
+    """Données des faux services : calendriers, boîte mail et carnet d'adresses."""
+
+    def __init__(self, calendars=(), events_per_calendar=200, drafts=100, contacts=1000, seed=42, quota=None):
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self.calls = Counter()
+
+        # Quota simulé : requêtes par seconde et par API au-delà desquelles la réponse est un 429
+        self.quota = quota
+        self._quota_window = {}
+
+        # Calendriers : événements et journal des modifications (pour les syncToken)
+        self.events = {calendar_id: {} for calendar_id in calendars}
+        self.event_log = {calendar_id: [] for calendar_id in calendars}
+        now = datetime.datetime.now(PARIS).replace(minute=0, second=0, microsecond=0)
+        for calendar_id in calendars:
+            for _ in range(events_per_calendar):
+                start = now + datetime.timedelta(hours=self._random.randint(-24 * 30, 24 * 60))
+                self._put_event(calendar_id, self._generated_event(start))
+
+        # Gmail : brouillons et messages associés
+        self.drafts = {}
+        self.messages = {}
+        for index in range(drafts):
+            self._put_draft(f"contact{index}@example.com", f"Brouillon {index}")
+
+        # People : contacts et journal des modifications
+        self.contacts = {}
+        self.contact_log = []
+        for index in range(contacts):
+            self._put_contact(self._generated_contact(index))
+
+    # Générateurs
+
+    def _generated_event(self, start):
+        ligne = self._random.choice(["1", "2"])
+        machine = self._random.choice(MACHINES)
+        probleme = self._random.choice(PROBLEMES)
+        end = start + datetime.timedelta(minutes=self._random.choice([30, 60, 90]))
+        return {
+            "summary": f"MAINTENANCE - {probleme} - {machine}",
+            "description": f"Ligne {ligne}",
+            "start": {"dateTime": _iso(start), "timeZone": "Europe/Paris"},
+            "end": {"dateTime": _iso(end), "timeZone": "Europe/Paris"},
+            "extendedProperties": {"private": {
+                "type": "maintenance",
+                "ligne": ligne,
+                "machine": machine,
+                "probleme": probleme,
+                "urgence": self._random.choice(URGENCES),
+            }},
+        }
+
+    def _generated_contact(self, index):
+        given_name = self._random.choice(PRENOMS)
+        family_name = f"{self._random.choice(NOMS)}{index // len(NOMS) or ''}"
+        return {
+            "names": [{"givenName": given_name, "familyName": family_name}],
+            "emailAddresses": [{"value": f"contact{index}@example.com"}],
+            "phoneNumbers": [{"value": f"+33 6 {index:08d}"}],
+            "biographies": [{"value": self._random.choice(["chef équipe", "responsable maintenance", "opérateur"]),
+                             "contentType": "TEXT_PLAIN"}],
+        }
+
+    # Écritures (appelées sous self._lock ou pendant l'initialisation)
+
+    def _put_event(self, calendar_id, body):
+        event = dict(body)
+        event.setdefault("id", uuid.uuid4().hex)
+        event["status"] = "confirmed"
+        event["htmlLink"] = f"https://calendar.google.com/calendar/event?eid={event['id']}"
+        self.events.setdefault(calendar_id, {})[event["id"]] = event
+        self.event_log.setdefault(calendar_id, []).append(event["id"])
+        return event
+
+    def _put_draft(self, recipient, subject):
+        message_id = uuid.uuid4().hex[:16]
+        draft_id = f"r{uuid.uuid4().int % 10**18}"
+        self.messages[message_id] = {"id": message_id, "to": recipient, "subject": subject}
+        self.drafts[draft_id] = {"id": draft_id, "message": {"id": message_id}}
+        return self.drafts[draft_id]
+
+    def _put_contact(self, body, resource_name=None):
+        person = dict(body)
+        person["resourceName"] = resource_name or f"people/c{uuid.uuid4().int % 10**18}"
+        person["etag"] = uuid.uuid4().hex
+        person["metadata"] = {}
+        self.contacts[person["resourceName"]] = person
+        self.contact_log.append(person["resourceName"])
+        return person
+
+    # Routes
+
+    def handle(self, method, path, query, body):
+        """Traite une requête et retourne (code HTTP, corps JSON)."""
+        path = unquote(path)
+        for pattern, http_method, name in ROUTES:
+            match = pattern.fullmatch(path)
+            if match and http_method == method:
+                with self._lock:
+                    if self._over_quota(path):
+                        self.calls["rate_limited"] += 1
+                        return 429, {"error": {"code": 429, "message": "Rate Limit Exceeded",
+                                               "errors": [{"reason": "rateLimitExceeded"}]}}
+                    self.calls[name] += 1
+                    return getattr(self, name)(query, body, *match.groups())
+        return 404, {"error": {"code": 404, "message": f"Route inconnue : {method} {path}"}}
+
+    def _over_quota(self, path):
+        """Compte la requête dans la fenêtre d'une seconde de son API (appelé sous verrou)."""
+        if not self.quota:
+            return False
+        api = path.split("/")[1]
+        second = int(time.monotonic())
+        window_second, count = self._quota_window.get(api, (second, 0))
+        if window_second != second:
+            window_second, count = second, 0
+        self._quota_window[api] = (window_second, count + 1)
+        return count >= self.quota
+
+    # Calendar
+
+    def events_list(self, query, body, calendar_id):
+        events = self.events.get(calendar_id, {})
+        log = self.event_log.get(calendar_id, [])
+        if "syncToken" in query:
+            position = int(query["syncToken"])
+            changed = dict.fromkeys(log[position:])
+            items = [events.get(event_id, {"id": event_id, "status": "cancelled"}) for event_id in changed]
+        else:
+            time_min = query.get("timeMin")
+            items = [
+                event for event in events.values()
+                if not time_min or event["end"]["dateTime"] > time_min[:19]
+            ]
+        return 200, self._page(query, "items", items, "maxResults", str(len(log)))
+
+    def events_insert(self, query, body, calendar_id):
+        return 200, self._put_event(calendar_id, body)
+
+    def events_delete(self, query, body, calendar_id, event_id):
+        if self.events.get(calendar_id, {}).pop(event_id, None) is None:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+        self.event_log[calendar_id].append(event_id)
+        return 204, None
+
+    def events_watch(self, query, body, calendar_id):
+        expiration = int((time.time() + 7 * 24 * 3600) * 1000)
+        return 200, {"id": body.get("id"), "resourceId": uuid.uuid4().hex, "expiration": str(expiration)}
+
+    # Gmail
+
+    def drafts_list(self, query, body, user_id):
+        drafts = list(self.drafts.values())
+        q = query.get("q", "")
+        recipient = re.search(r"to:(\S+)", q)
+        subject = re.search(r'subject:"([^"]*)"', q)
+        if recipient or subject:
+            drafts = [
+                draft for draft in drafts
+                if (not recipient or self.messages[draft["message"]["id"]]["to"] == recipient.group(1))
+                and (not subject or subject.group(1).lower() in self.messages[draft["message"]["id"]]["subject"].lower())
+            ]
+        drafts = drafts[:int(query.get("maxResults", 100))]
+        return 200, {"drafts": drafts, "resultSizeEstimate": len(drafts)} if drafts else {"resultSizeEstimate": 0}
+
+    def drafts_create(self, query, body, user_id):
+        raw = base64.urlsafe_b64decode(body["message"]["raw"])
+        message = message_from_bytes(raw)
+        return 200, self._put_draft(message["to"], message["subject"])
+
+    def drafts_send(self, query, body, user_id):
+        draft = self.drafts.pop(body.get("id"), None)
+        if draft is None:
+            return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+        return 200, {"id": draft["message"]["id"], "threadId": draft["message"]["id"], "labelIds": ["SENT"]}
+
+    def messages_get(self, query, body, user_id, message_id):
+        message = self.messages.get(message_id)
+        if message is None:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+        headers = [{"name": "To", "value": message["to"]}, {"name": "Subject", "value": message["subject"]}]
+        return 200, {"id": message_id, "payload": {"headers": headers}}
+
+    def messages_send(self, query, body, user_id):
+        message_id = uuid.uuid4().hex[:16]
+        return 200, {"id": message_id, "threadId": message_id, "labelIds": ["SENT"]}
+
+    # People
+
+    def connections_list(self, query, body, resource_name):
+        if "syncToken" in query:
+            position = int(query["syncToken"])
+            changed = dict.fromkeys(self.contact_log[position:])
+            items = [
+                self.contacts.get(name, {"resourceName": name, "metadata": {"deleted": True}})
+                for name in changed
+            ]
+        else:
+            items = list(self.contacts.values())
+        return 200, self._page(query, "connections", items, "pageSize", str(len(self.contact_log)))
+
+    def create_contact(self, query, body):
+        return 200, self._put_contact(body)
+
+    def update_contact(self, query, body, resource_name):
+        existing = self.contacts.get(resource_name)
+        if existing is None:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+        fields = query.get("updatePersonFields", "").split(",")
+        updated = {**existing, **{field: body.get(field, []) for field in fields if field}}
+        return 200, self._put_contact(updated, resource_name)
+
+    def delete_contact(self, query, body, resource_name):
+        if self.contacts.pop(resource_name, None) is None:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+        self.contact_log.append(resource_name)
+        return 200, {}
+
+    @staticmethod
+    def _page(query, key, items, size_param, sync_token):
+        """Découpe une liste en pages ; la dernière page porte le jeton de synchronisation."""
+        offset = int(query.get("pageToken", 0))
+        size = int(query.get(size_param, 100))
+        page = {key: items[offset:offset + size]}
+        if offset + size < len(items):
+            page["nextPageToken"] = str(offset + size)
+        else:
+            page["nextSyncToken"] = sync_token
+        return page
+
+
+ROUTES = [(re.compile(pattern), method, name) for pattern, method, name in [
+    (r"/calendar/v3/calendars/([^/]+)/events", "GET", "events_list"),
+    (r"/calendar/v3/calendars/([^/]+)/events", "POST", "events_insert"),
+    (r"/calendar/v3/calendars/([^/]+)/events/watch", "POST", "events_watch"),
+    (r"/calendar/v3/calendars/([^/]+)/events/([^/]+)", "DELETE", "events_delete"),
+    (r"/gmail/v1/users/([^/]+)/drafts", "GET", "drafts_list"),
+    (r"/gmail/v1/users/([^/]+)/drafts", "POST", "drafts_create"),
+    (r"/gmail/v1/users/([^/]+)/drafts/send", "POST", "drafts_send"),
+    (r"/gmail/v1/users/([^/]+)/messages/send", "POST", "messages_send"),
+    (r"/gmail/v1/users/([^/]+)/messages/([^/]+)", "GET", "messages_get"),
+    (r"/v1/(people/me)/connections", "GET", "connections_list"),
+    (r"/v1/people:createContact", "POST", "create_contact"),
+    (r"/v1/(people/[^/:]+):updateContact", "PATCH", "update_contact"),
+    (r"/v1/(people/[^/:]+):deleteContact", "DELETE", "delete_contact"),
+]]
+
+
+def _make_handler(state, latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # En-têtes et corps écrits séparément : sans ceci, Nagle + ACK retardé ajoutent ~40 ms par réponse
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _send(self, status, payload, content_type="application/json"):
+            data = payload if isinstance(payload, bytes) else (json.dumps(payload).encode() if payload is not None else b"")
+            self.send_response(status)
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _dispatch(self):
+            # Une latence par aller-retour HTTP (un lot batch ne la paie qu'une fois)
+            if latency:
+                time.sleep(latency)
+            url = urlsplit(self.path)
+            body = self._read_body()
+
+            if url.path.startswith("/batch"):
+                with state._lock:
+                    state.calls["batch"] += 1
+                self._send_batch(body)
+                return
+
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            status, payload = state.handle(self.command, url.path, query, json.loads(body) if body else {})
+            self._send(status, payload)
+
+        def _send_batch(self, body):
+            content_type = self.headers["Content-Type"]
+            request = BytesParser(policy=default_policy).parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode() + body
+            )
+            boundary = f"batch_{uuid.uuid4().hex}"
+            parts = []
+            for part in request.iter_parts():
+                content_id = part["Content-ID"].strip("<>")
+                raw = part.get_payload(decode=True)
+                head, _, inner_body = raw.partition(b"\r\n\r\n")
+                request_line = head.split(b"\r\n")[0].decode()
+                method, target, _ = request_line.split(" ", 2)
+                url = urlsplit(target)
+                query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                status, payload = state.handle(method, url.path, query, json.loads(inner_body) if inner_body.strip() else {})
+                content = json.dumps(payload) if payload is not None else ""
+                parts.append(
+                    f"--{boundary}\r\n"
+                    f"Content-Type: application/http\r\n"
+                    f"Content-ID: <response-{content_id}>\r\n\r\n"
+                    f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(content.encode())}\r\n\r\n"
+                    f"{content}\r\n"
+                )
+            self._send(200, ("".join(parts) + f"--{boundary}--\r\n").encode(),
+                       content_type=f"multipart/mixed; boundary={boundary}")
+
+        do_GET = do_POST = do_PATCH = do_DELETE = do_PUT = _dispatch
+
+    return Handler
+
+
+class FakeGoogleAPI:
+    """Serveur local de la fausse API Google, démarré dans un thread."""
+
+    def __init__(self, state, latency=0.05, host="127.0.0.1", port=0):
+        self.state = state
+        self.server = ThreadingHTTPServer((host, port), _make_handler(state, latency))
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}/"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="fake-google-api", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+    def install(self, timeout=10):
+        """Remplace les services Google d'Orion par des clients pointant vers ce serveur.
+
+        Chaque thread reçoit son propre transport (non authentifié) via le transport d'Orion.
+        `timeout` borne chaque lecture socket : une connexion bloquée échoue au lieu d'immobiliser un thread.
+        """
+        import httplib2
+        from googleapiclient.discovery import build_from_document
+        from googleapiclient.discovery_cache import get_static_doc
+        from orion.services.google.auth import SERVICE_VERSIONS, service
+        from orion.services.google.transport import transport
+
+        transport.set_factory(lambda: httplib2.Http(timeout=timeout))
+        for name, version in SERVICE_VERSIONS.items():
+            document = json.loads(get_static_doc(name, version))
+            document["rootUrl"] = self.url
+            document["mtlsRootUrl"] = self.url
+            document["baseUrl"] = self.url + document.get("servicePath", "")
+            service.override(name, build_from_document(document, http=transport.http()))
+        return self
+
+
+if __name__ == "__main__":
+    # Serveur autonome : python scripts/fake_google_api.py [port] [latence_ms]
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8085
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 50
+    api = FakeGoogleAPI(FakeGoogleState(calendars=["maintenance", "ligne1", "ligne2"]), latency_ms / 1000, port=port)
+    print(f"Fausse API Google sur {api.url} (latence {latency_ms:.0f} ms)")
+    api.server.serve_forever()
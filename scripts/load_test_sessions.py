@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Test de charge multi-sessions de l'agent Orion
+Lance N sessions simulées dans un seul processus, comme autant de jobs sur un même worker.
+Chaque session reçoit son prompt et son contexte de fonctions, puis un modèle scripté (à la place
+du modèle temps réel) appelle les outils à un rythme réaliste contre la fausse API Google locale.
+Le nombre de sessions augmente par paliers ; chaque palier relève la latence des outils (p50, p95, p99),
+le retard de la boucle d'événements et la mémoire du processus.
+
+Exemple :
+    python scripts/load_test_sessions.py --sessions 1,10,25,50,100 --step-duration 30 --latency 80
+"""
+
+import os
+import time
+import random
+import asyncio
+import argparse
+import resource
+import statistics
+
+from fake_google_api import FakeGoogleAPI, FakeGoogleState
+
+CALENDARS = {
+    "MAINTENANCE_CALENDAR_ID": "maintenance",
+    "PRODUCTION_LIGNE_1_CALENDAR_ID": "ligne1",
+    "PRODUCTION_LIGNE_2_CALENDAR_ID": "ligne2",
+}
+os.environ.update(CALENDARS)
+os.environ.setdefault("EMAIL_MAINTENANCE", "maintenance@example.com")
+
+# Intervalle de mesure du retard de la boucle d'événements (secondes)
+LAG_PROBE_INTERVAL = 0.05
+
+# Répartition des demandes d'un opérateur : (poids, outil, générateur d'arguments).
+# Chaque session écrit à son propre destinataire et envoie son dernier brouillon.
+TOOL_MIX = [
+    (4, "get_maintenance_schedule", lambda rnd, session: dict(nombre_jours=rnd.choice([1, 7, 30]))),
+    (3, "research_contact", lambda rnd, session: dict(first_name=rnd.choice(["Stéphane", "Stefan", "Marie", "Filip"]))),
+    (2, "schedule_maintenance", lambda rnd, session: dict(
+        ligne_production=rnd.choice(["1", "2"]), machine_name="Convoyeur",
+        probleme_description="Bruit anormal", urgence=rnd.choice(["urgent", "moyen", "faible"]))),
+    (2, "list_event", lambda rnd, session: dict(
+        calendar_name="MAINTENANCE_CALENDAR_ID", date=time.strftime("%Y-%m-%d"))),
+    (1, "create_draft", lambda rnd, session: dict(
+        recipient=f"charge{session}@example.com", subject=f"Rapport session {session}", body="Bonjour")),
+    (1, "send_draft", lambda rnd, session: dict(
+        recipient=f"charge{session}@example.com", subject=f"Rapport session {session}")),
+]
+
+
+def rss_mb():
+    """Mémoire résidente actuelle du processus (Mo), pic à défaut de /proc."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, ratio):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+class ScriptedSession:
+    """Une session simulée : prompt, contexte de fonctions et modèle scripté qui appelle les outils."""
+
+    def __init__(self, index, think_time, samples, seed):
+        from orion.app.functions import AssistantFnc
+        from orion.prompts.orion import orion_prompt_system
+
+        self.index = index
+        self.think_time = think_time
+        self.samples = samples
+        self.random = random.Random(seed)
+        # Même initialisation que l'entrypoint d'un job (sans room : les liens ne sont pas publiés)
+        self.instructions = orion_prompt_system()
+        self.fnc_ctx = AssistantFnc()
+        self.requests = 0
+
+    async def run(self, stop):
+        weights = [weight for weight, _, _ in TOOL_MIX]
+        while not stop.is_set():
+            # Temps de parole de l'opérateur et de réponse du modèle entre deux demandes
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.random.expovariate(1 / self.think_time))
+                return
+            except asyncio.TimeoutError:
+                pass
+
+            _, name, make_args = self.random.choices(TOOL_MIX, weights=weights)[0]
+            self.requests += 1
+            arguments = make_args(self.random, self.index)
+
+            # Appel tel que le fait l'agent : via la fonction enregistrée dans le contexte
+            # (une exception est rapportée au modèle par l'agent, elle compte comme une erreur)
+            started = time.perf_counter()
+            try:
+                result = await self.fnc_ctx.ai_functions[name].callable(**arguments)
+                failed = isinstance(result, str) and result.startswith("Erreur")
+            except Exception:
+                failed = True
+            self.samples.append((name, time.perf_counter() - started, failed))
+
+
+async def measure_loop_lag(lags, stop):
+    """Relève le retard de réveil de la boucle d'événements (blocage par du code synchrone)."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + LAG_PROBE_INTERVAL
+        await asyncio.sleep(LAG_PROBE_INTERVAL)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def run_step(count, sessions, args):
+    """Maintient `count` sessions actives pendant un palier et retourne ses mesures."""
+    while len(sessions) < count:
+        sessions.append(ScriptedSession(len(sessions), args.think_time, None, seed=len(sessions)))
+
+    samples, lags = [], []
+    stop = asyncio.Event()
+    for session in sessions[:count]:
+        session.samples = samples
+
+    tasks = [asyncio.create_task(session.run(stop)) for session in sessions[:count]]
+    tasks.append(asyncio.create_task(measure_loop_lag(lags, stop)))
+    await asyncio.sleep(args.step_duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    return samples, lags
+
+
+async def run(args):
+    state = FakeGoogleState(
+        calendars=CALENDARS.values(),
+        events_per_calendar=args.events,
+        drafts=args.drafts,
+        contacts=args.contacts,
+        quota=args.quota,
+    )
+    api = FakeGoogleAPI(state, latency=args.latency / 1000).start().install()
+
+    from orion.services.google.calendar_store import calendar_store
+    from orion.services.google.contacts_directory import contact_directory
+
+    # Caches chargés comme par le préchauffage du worker
+    contact_directory.sync(force=True)
+    for calendar_id in CALENDARS.values():
+        calendar_store.sync(calendar_id, force=True)
+
+    print(f"Fausse API : latence {args.latency:.0f} ms ; réflexion moyenne {args.think_time:.1f}s ; "
+          f"paliers de {args.step_duration:.0f}s ; mémoire initiale {rss_mb():.0f} Mo\n")
+    print(f"{'sessions':>8} {'appels':>7} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} "
+          f"{'lag p99':>8} {'lag max':>8} {'RSS':>7}  outil le plus lent (p95)")
+
+    sessions = []
+    for count in args.sessions:
+        samples, lags = await run_step(count, sessions, args)
+        latencies = [elapsed for _, elapsed, _ in samples]
+        errors = sum(1 for _, _, failed in samples if failed)
+
+        per_tool = {}
+        for name, elapsed, _ in samples:
+            per_tool.setdefault(name, []).append(elapsed)
+        slowest = max(per_tool.items(), key=lambda item: percentile(item[1], 0.95), default=None)
+        slowest_label = f"{slowest[0]} {percentile(slowest[1], 0.95) * 1000:.0f}ms" if slowest else "-"
+
+        print(
+            f"{count:>8} {len(samples):>7} {errors:>4} "
+            f"{statistics.median(latencies) * 1000 if latencies else 0:>6.0f}ms "
+            f"{percentile(latencies, 0.95) * 1000:>6.0f}ms {percentile(latencies, 0.99) * 1000:>6.0f}ms "
+            f"{percentile(lags, 0.99) * 1000:>6.1f}ms {max(lags, default=0) * 1000:>6.1f}ms "
+            f"{rss_mb():>5.0f}Mo  {slowest_label}"
+        )
+
+    if args.quota:
+        print(f"\nRéponses 429 de la fausse API (quota {args.quota}/s par API) : {state.calls['rate_limited']}")
+    api.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge multi-sessions de l'agent Orion (fausse API Google)")
+    parser.add_argument("--sessions", type=lambda value: [int(n) for n in value.split(",")], default=[1, 5, 10, 25, 50],
+                        help="Paliers de sessions simultanées, ex: 1,10,50")
+    parser.add_argument("--step-duration", type=float, default=20, help="Durée de chaque palier (s)")
+    parser.add_argument("--think-time", type=float, default=6, help="Temps moyen entre deux demandes d'une session (s)")
+    parser.add_argument("--latency", type=float, default=50, help="Latence par aller-retour HTTP de la fausse API (ms)")
+    parser.add_argument("--events", type=int, default=500, help="Événements par calendrier")
+    parser.add_argument("--drafts", type=int, default=200, help="Brouillons dans la boîte mail")
+    parser.add_argument("--contacts", type=int, default=2000, help="Contacts du carnet d'adresses")
+    parser.add_argument("--quota", type=int, help="Requêtes par seconde et par API au-delà desquelles la fausse API répond 429")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Simule une notification push Google Calendar vers le serveur local
+Permet de tester /calendarWebhook et la mise à jour de la vue maintenance sans URL publique
+
+Sans CALENDAR_WEBHOOK_URL, le serveur n'a pas de canal Google et accepte toute notification portant
+le bon jeton. Avec un abonnement actif, seul le canal en cours est accepté : passer son identifiant
+(journalisé par le serveur : "Abonnement aux notifications du calendrier maintenance : canal <id>")
+en troisième argument ou via CALENDAR_WEBHOOK_CHANNEL_ID.
+"""
+
+import os
+import sys
+import requests
+from dotenv import load_dotenv
+
+# Charger backend/.env (même fichier que le serveur)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+load_dotenv(os.path.join(project_root, "backend/.env"))
+
+def simulate_push(server_url="http://localhost:5000", state="exists", channel_id=None):
+    """Envoie une notification au format Google Calendar (en-têtes X-Goog-*)"""
+    token = os.getenv("CALENDAR_WEBHOOK_TOKEN")
+    if not token:
+        print("❌ CALENDAR_WEBHOOK_TOKEN manquant : le serveur refuserait la notification")
+        return False
+
+    headers = {
+        "X-Goog-Channel-Token": token,
+        "X-Goog-Resource-ID": "local-stand-in",
+        "X-Goog-Resource-State": state,
+        "X-Goog-Message-Number": "1",
+    }
+    channel_id = channel_id or os.getenv("CALENDAR_WEBHOOK_CHANNEL_ID")
+    if channel_id:
+        headers["X-Goog-Channel-ID"] = channel_id
+
+    print(f"🔄 Notification '{state}' envoyée à {server_url}/calendarWebhook...")
+    response = requests.post(f"{server_url}/calendarWebhook", headers=headers, timeout=10)
+    print(f"   Réponse : {response.status_code}")
+    if response.status_code == 403:
+        print("❌ Notification refusée : jeton différent de celui du serveur, ou abonnement Google actif")
+        print("   Passer l'identifiant du canal journalisé par le serveur (CALENDAR_WEBHOOK_CHANNEL_ID)")
+    if response.status_code != 200:
+        return False
+
+    schedule = requests.get(f"{server_url}/maintenanceSchedule", timeout=10).json()
+    print(f"✅ Vue maintenance : {len(schedule.get('interventions', []))} intervention(s)")
+    return True
+
+if __name__ == "__main__":
+    url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:5000"
+    resource_state = sys.argv[2] if len(sys.argv) > 2 else "exists"
+    channel = sys.argv[3] if len(sys.argv) > 3 else None
+
+    success = simulate_push(url, resource_state, channel)
+    sys.exit(0 if success else 1)